@@ -0,0 +1,135 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+from rich.console import Console
+from rich.table import Table
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.cases import CASES  # noqa: E402
+
+console = Console()
+
+DEFAULT_BASELINE = os.path.join(ROOT_DIR, "benchmarks", "baseline.json")
+DEFAULT_THRESHOLD = 0.15
+RESULTS_VERSION = 1
+
+def summarize(timings):
+    return {
+        "rounds": len(timings),
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings) if hasattr(statistics, "fmean") else statistics.mean(timings),
+        "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+    }
+
+def _git_commit():
+    try:
+        ret = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+                             capture_output=True, text=True)
+        return ret.stdout.strip() or None
+    except OSError:
+        return None
+
+def run(selected, quick):
+    results = {}
+    for name in selected:
+        console.print(f"[bold blue]⏱  {name}...[/bold blue]")
+        for case_name, timings in CASES[name](quick).items():
+            results[case_name] = summarize(timings)
+    return {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+def compare(report, baseline, threshold):
+    """Adds the median ratio against the baseline to every result. Returns the regressed case names."""
+    regressions = []
+    for name, stats in report["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base.get("median"):
+            continue
+        ratio = stats["median"] / base["median"]
+        stats["baseline_median"] = base["median"]
+        stats["ratio"] = ratio
+        if ratio > 1 + threshold:
+            regressions.append(name)
+    return regressions
+
+def _format_time(seconds):
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.0f}µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.1f}ms"
+    return f"{seconds:.2f}s"
+
+def print_table(report, regressions):
+    table = Table(title="pck benchmarks")
+    table.add_column("Case")
+    table.add_column("Median", justify="right")
+    table.add_column("Min", justify="right")
+    table.add_column("Stdev", justify="right")
+    table.add_column("Baseline", justify="right")
+    table.add_column("Change", justify="right")
+    for name, stats in report["results"].items():
+        change = ""
+        if "ratio" in stats:
+            color = "red" if name in regressions else ("green" if stats["ratio"] < 1 else "white")
+            change = f"[{color}]{(stats['ratio'] - 1) * 100:+.1f}%[/{color}]"
+        table.add_row(name, _format_time(stats["median"]), _format_time(stats["min"]),
+                      _format_time(stats["stdev"]),
+                      _format_time(stats["baseline_median"]) if "baseline_median" in stats else "",
+                      change)
+    console.print(table)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="pck benchmark suite")
+    parser.add_argument("cases", nargs="*", help=f"Groups to run (default: all). Available: {', '.join(CASES)}")
+    parser.add_argument("--quick", action="store_true", help="Smaller inputs and fewer rounds.")
+    parser.add_argument("-o", "--output", help="Write the JSON results to this file.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare against.")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Median slowdown ratio flagged as a regression (default: 0.15).")
+    args = parser.parse_args(argv)
+
+    unknown = [c for c in args.cases if c not in CASES]
+    if unknown:
+        parser.error(f"unknown case(s): {', '.join(unknown)}")
+
+    report = run(args.cases or list(CASES), args.quick)
+
+    regressions = []
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.threshold)
+    print_table(report, regressions)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        console.print(f"[green]Baseline saved to {args.baseline}[/green]")
+
+    if regressions:
+        console.print(f"[bold red]Regressions (> {args.threshold:.0%} slower): {', '.join(regressions)}[/bold red]")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+import os
+import sys
+import time
+import shutil
+import subprocess
+from benchmarks import fixtures
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Registered benchmark groups, in execution order: name -> function(quick) -> {case: [seconds]}
+CASES = {}
+
+def case(name):
+    def register(func):
+        CASES[name] = func
+        return func
+    return register
+
+def measure(func, rounds, setup=None):
+    """Runs func 'rounds' times and returns the wall-clock durations (setup excluded)."""
+    timings = []
+    for _ in range(rounds):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def _silence(*modules):
+    """pck modules print through a module-level rich console: mute it during measurements."""
+    for module in modules:
+        module.console.quiet = True
+
+# --- CLI COLD START ---
+@case("startup")
+def bench_startup(quick):
+    """Fresh interpreter running 'pck version' (imports, config-free command path)."""
+    cmd = [sys.executable, os.path.join(ROOT_DIR, "main.py"), "version"]
+    with fixtures.Workspace() as ws:
+        # Timing history still recorded (it is part of the cost), away from the user's one
+        env = dict(os.environ, PCK_STATS_DB=os.path.join(ws, "stats.sqlite"))
+        run = lambda: subprocess.run(cmd, cwd=ROOT_DIR, env=env, capture_output=True, check=True)
+        run()  # warm the OS file cache and __pycache__
+        return {"startup/version": measure(run, 5 if quick else 15)}
+
+# --- .PC PARSING ---
+@case("parse_pc")
+def bench_parse_pc(quick):
+    from src import cpp_manager
+
+    sizes = (10, 100, 1000) if quick else (10, 100, 1000, 10000)
+    results = {}
+    with fixtures.Workspace() as ws:
+        for count in sizes:
+            tree = fixtures.make_pc_tree(os.path.join(ws, f"pc{count}"), count)
+            rounds = 3 if count >= 10000 else 10
+            results[f"parse_pc/{count}"] = measure(lambda: cpp_manager.parse_pc_files(tree), rounds)
+    return results
+
+# --- TOOL DOWNLOAD + EXTRACT ---
+# (label, file count, file size)
+ARCHIVES = (
+    ("small", 10, 1024),
+    ("many_files", 5000, 1024),
+    ("large", 8, 8 * 1024 * 1024),
+)
+QUICK_ARCHIVES = (
+    ("small", 10, 1024),
+    ("many_files", 1000, 1024),
+    ("large", 4, 2 * 1024 * 1024),
+)
+
+@case("install_tool")
+def bench_install_tool(quick):
+    from src import download, store
+
+    _silence(download)
+    results = {}
+    with fixtures.Workspace() as ws:
+        www = os.path.join(ws, "www")
+        os.makedirs(www)
+        with fixtures.FileServer(www) as server:
+            for label, count, size in (QUICK_ARCHIVES if quick else ARCHIVES):
+                name = f"{label}.zip"
+                fixtures.make_zip(os.path.join(www, name), count, size)
+                config = fixtures.tool_config(os.path.join(ws, "langage"), server.url(name))
+
+                def reset():
+                    shutil.rmtree(store.get_store_root(config), ignore_errors=True)
+                    download._resolved_cache.clear()
+
+                def install():
+                    if not download.ensure_tool_installed("bench", config):
+                        raise RuntimeError(f"install of {name} failed")
+
+                results[f"install_tool/{label}"] = measure(install, 3 if quick else 5, setup=reset)
+
+            # Already installed: the path every pck command takes
+            results["install_tool/present"] = measure(
+                lambda: download.ensure_tool_installed("bench", config), 50,
+                setup=download._resolved_cache.clear)
+    return results
+
+# --- EXTRACTION ENGINE vs extractall ---
+@case("extract")
+def bench_extract(quick):
+    import tarfile
+    import zipfile
+    from src import extract
+
+    results = {}
+    with fixtures.Workspace() as ws:
+        out = os.path.join(ws, "out")
+        clean = lambda: shutil.rmtree(out, ignore_errors=True)
+        rounds = 3 if quick else 5
+        for label, count, size in (QUICK_ARCHIVES if quick else ARCHIVES)[1:]:
+            archive = fixtures.make_zip(os.path.join(ws, f"{label}.zip"), count, size)
+
+            def baseline():
+                with zipfile.ZipFile(archive) as zf:
+                    zf.extractall(out)
+            results[f"extract/{label}/extractall"] = measure(baseline, rounds, setup=clean)
+            results[f"extract/{label}/parallel"] = measure(
+                lambda: extract.extract_archive(archive, out), rounds, setup=clean)
+
+            # Same content as tar.gz (the Linux toolchain format)
+            clean()
+            baseline()
+            tarball = os.path.join(ws, f"{label}.tar.gz")
+            with tarfile.open(tarball, "w:gz") as tf:
+                tf.add(out, arcname=label)
+
+            def tar_baseline():
+                with tarfile.open(tarball) as tf:
+                    tf.extractall(out)
+            results[f"extract/{label}/tar_extractall"] = measure(tar_baseline, rounds, setup=clean)
+            results[f"extract/{label}/tar_parallel"] = measure(
+                lambda: extract.extract_archive(tarball, out, kind="tar"), rounds, setup=clean)
+    return results
+
+# --- RUN_SCRIPT ---
+SOURCE = "int main(void) { return 0; }\n"
+
+@case("run_script")
+def bench_run_script(quick):
+    if os.name == "nt":
+        return {}  # The stub's output is a shell script: POSIX only
+
+    from src import cpp_manager, download
+
+    _silence(cpp_manager, download)
+    results = {}
+    previous_cwd = os.getcwd()
+    with fixtures.Workspace() as ws:
+        config = fixtures.tool_config(os.path.join(ws, "langage"), "stub://bench")
+        fixtures.install_stub_compiler(config)
+        project = os.path.join(ws, "project")
+        os.makedirs(project)
+        os.chdir(project)
+        try:
+            with open("main.c", "w", encoding="utf-8") as f:
+                f.write(SOURCE)
+            rounds = 5 if quick else 15
+            cpp_manager.run_script(config, "main.c")
+
+            # Nothing changed: build cache hit + launch
+            results["run_script/noop"] = measure(lambda: cpp_manager.run_script(config, "main.c"), rounds)
+
+            # Source edited before every round (the cache hashes contents): stub compile + launch
+            edits = iter(range(sys.maxsize))
+            def edit():
+                with open("main.c", "w", encoding="utf-8") as f:
+                    f.write(f"/* edit {next(edits)} */\n{SOURCE}")
+            results["run_script/rebuild"] = measure(lambda: cpp_manager.run_script(config, "main.c"),
+                                                    rounds, setup=edit)
+        finally:
+            os.chdir(previous_cwd)
+    return results
@@ -0,0 +1,167 @@
+import os
+import re
+import sys
+import stat
+import shutil
+import zipfile
+import tempfile
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+# Synthetic inputs for the benchmark cases. Everything is generated under a
+# temporary workspace, nothing touches the real 'langage' folder or the network.
+
+# --- .PC TREES ---
+PC_TEMPLATE = """prefix=${{pcfiledir}}/../{name}
+libdir=${{prefix}}/lib
+includedir=${{prefix}}/include
+bindir=${{prefix}}/bin
+
+Name: {name}
+Description: synthetic package {index}
+Version: 1.{index}.0
+Requires: {requires}
+Libs: -L${{libdir}} -l{name} -lcommon
+Cflags: -I${{includedir}} -I${{includedir}}/{name} -DPKG_{index}=1
+"""
+
+def make_pc_tree(root, count):
+    """Writes 'count' .pc files shaped like the ones Conan's PkgConfigDeps generates."""
+    os.makedirs(root, exist_ok=True)
+    for i in range(count):
+        name = f"pkg{i}"
+        requires = f"pkg{i - 1}" if i else ""
+        with open(os.path.join(root, f"{name}.pc"), "w", encoding="utf-8") as f:
+            f.write(PC_TEMPLATE.format(name=name, index=i, requires=requires))
+    return root
+
+# --- TOOL ARCHIVES + HTTP SERVER ---
+def make_zip(path, file_count, file_size, exe_name="tool"):
+    """Zip with file_count files of file_size bytes (half compressible) plus an 'executable'."""
+    half = file_size // 2
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(exe_name, b"#!/bin/sh\nexit 0\n")
+        for i in range(file_count):
+            data = os.urandom(half) + b"x" * (file_size - half)
+            zf.writestr(f"lib/d{i % 64}/f{i}.dat", data)
+    return path
+
+class _RangeHandler(SimpleHTTPRequestHandler):
+    """SimpleHTTPRequestHandler plus single 'Range: bytes=a-b' requests (206 responses)."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def end_headers(self):
+        self.send_header("Accept-Ranges", "bytes")
+        super().end_headers()
+
+    def send_head(self):
+        match = re.fullmatch(r"bytes=(\d*)-(\d*)", self.headers.get("Range", ""))
+        path = self.translate_path(self.path)
+        if not match or not os.path.isfile(path):
+            return super().send_head()
+
+        size = os.path.getsize(path)
+        first, last = match.groups()
+        if first:
+            start, end = int(first), min(int(last) if last else size - 1, size - 1)
+        else:
+            start, end = max(0, size - int(last)), size - 1
+        if start > end:
+            self.send_error(416)
+            return None
+
+        f = open(path, "rb")
+        f.seek(start)
+        self.send_response(206)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Last-Modified", self.date_time_string(int(os.path.getmtime(path))))
+        self.end_headers()
+        return _Limited(f, end - start + 1)
+
+class _Limited:
+    """File wrapper stopping after 'remaining' bytes (copyfile() reads until EOF)."""
+
+    def __init__(self, f, remaining):
+        self.f = f
+        self.remaining = remaining
+
+    def read(self, n=-1):
+        n = self.remaining if n < 0 else min(n, self.remaining)
+        data = self.f.read(n)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.f.close()
+
+class FileServer:
+    """Serves a folder over HTTP (with Range support) on 127.0.0.1 from a background thread."""
+
+    def __init__(self, directory):
+        handler = partial(_RangeHandler, directory=directory)
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def url(self, name):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/{name}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def tool_config(base_dir, url, folder_name="tool", exe_path="tool/tool"):
+    """Minimal config dict in the shape load_config() returns."""
+    return {
+        "settings": {"base_dir": base_dir},
+        "tools": {"bench": {"url": url, "exe_path": exe_path, "folder_name": folder_name}},
+    }
+
+# --- STUB COMPILER ---
+# Stands in for zig: writes a no-op program to the '-o' path, so run_script can
+# be measured without a real toolchain.
+STUB_COMPILER = """import os, sys
+args = sys.argv[1:]
+out = args[args.index("-o") + 1]
+with open(out, "w") as f:
+    f.write("#!/bin/sh\\nexit 0\\n")
+os.chmod(out, 0o755)
+"""
+
+def install_stub_compiler(config):
+    """
+    Places the stub where the store expects the 'zig' tool of config, so
+    ensure_tool_installed resolves it like an installed toolchain.
+    Returns its path.
+    """
+    from src.store import get_entry_dir
+
+    folder = "zig"
+    config["tools"]["zig"] = {"url": "stub://zig", "exe_path": f"{folder}/zig", "folder_name": folder}
+    exe_dir = os.path.join(get_entry_dir("zig", config), folder)
+    os.makedirs(exe_dir, exist_ok=True)
+
+    exe = os.path.join(exe_dir, "zig")
+    with open(exe, "w", encoding="utf-8") as f:
+        f.write(f"#!{sys.executable}\n" + STUB_COMPILER)
+    os.chmod(exe, os.stat(exe).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return exe
+
+class Workspace:
+    """Temporary folder removed on exit."""
+
+    def __enter__(self):
+        self.path = tempfile.mkdtemp(prefix="pck-bench-")
+        return self.path
+
+    def __exit__(self, *exc):
+        shutil.rmtree(self.path, ignore_errors=True)
@@ -1,38 +1,68 @@
+import time
+_process_t0 = time.perf_counter()  # Before the other imports: 'pck stats' counts them
 import typer
 import os
 import subprocess
 import sys
+import re
 import shlex
-from importlib.metadata import version as get_version
+from typing import List
 from rich.console import Console
-from rich.panel import Panel
-from src.download import ensure_tool_installed
-from src.utils import load_config, get_tool_path, get_npm_command
-from src import cpp_manager
+from src.utils import load_config, get_tool_path, get_npm_command, apply_offline_mode
+from src import trace
+from src import history
+history.mark_process_start(_process_t0)
+
+# Subsystems (downloads, C/C++ toolchain, tool store...) are imported inside the
+# commands that need them, so 'pck version' or '--help' don't pay for requests & co.
 
 app = typer.Typer(help="PCK: The Universal Language Runner", add_completion=False)
+tools_app = typer.Typer(help="Manage the provisioned toolchains.", add_completion=False)
+app.add_typer(tools_app, name="tools")
+bundle_app = typer.Typer(help="Offline bundles of the provisioned tools and package caches.", add_completion=False)
+app.add_typer(bundle_app, name="bundle")
 console = Console()
 
 # --- CONFIG ---
-try:
-    config = load_config()
-except Exception as e:
-    console.print(f"[bold red]Critical Error loading config:[/bold red] {e}")
-    sys.exit(1)
+# Loaded on first use and kept for the whole process (the shell reuses it).
+_config = None
+
+def get_config():
+    global _config
+    if _config is None:
+        try:
+            with trace.span("load_config"):
+                _config = load_config()
+        except Exception as e:
+            console.print(f"[bold red]Critical Error loading config:[/bold red] {e}")
+            sys.exit(1)
+        # After 'pck bundle import': uv and npm only use their caches
+        apply_offline_mode(_config)
+    return _config
 
-PCK_MAIN_SCRIPT = os.path.abspath(__file__)
+HISTORY_FILE = os.path.join(os.path.expanduser("~"), ".pck_history")
 
 def run_command(cmd_list, cwd=None):
     """Executes a system command (mainly used for Py and JS here)."""
     try:
         # Convert all arguments to string just in case
         cmd_list = [str(c) for c in cmd_list]
-        process = subprocess.run(cmd_list, cwd=cwd, shell=False)
+        process = trace.run(cmd_list, cwd=cwd, shell=False)
         return process.returncode
     except Exception as e:
         console.print(f"[bold red]Execution Error:[/bold red] {e}")
         return 1
 
+def resolve_profile(project_dir, name):
+    """Build profile from the option / pck.yaml, exits on an unknown name."""
+    from src import profiles
+
+    try:
+        return profiles.resolve(project_dir, name)
+    except ValueError as e:
+        console.print(f"[red]{e}[/red]")
+        raise typer.Exit(1)
+
 def get_python_executable(cwd):
     """
     Detects if a .venv exists in the given directory.
@@ -50,8 +80,70 @@ def get_python_executable(cwd):
             return python_exe
     return None
 
+def dispatch_in_process(args):
+    """
+    Runs a pck command inside the current interpreter (no new Python process).
+    Reuses the loaded config and tool path cache; SystemExit and cwd changes
+    are contained so the shell keeps running. Returns the exit code.
+    """
+    cwd = os.getcwd()
+    try:
+        app(args=args, prog_name="pck")
+        return 0
+    except SystemExit as e:
+        code = e.code
+        return code if isinstance(code, int) else (0 if code is None else 1)
+    finally:
+        try: os.chdir(cwd)
+        except OSError: pass
+
+def _setup_line_editing():
+    """History and tab completion, when readline is available (not on plain Windows)."""
+    try:
+        import readline
+    except ImportError:
+        return None
+
+    try: readline.read_history_file(HISTORY_FILE)
+    except OSError: pass
+    readline.set_history_length(1000)
+
+    import typer.main
+    commands = sorted(typer.main.get_command(app).commands)
+    shell_words = ["pck", "cd", "exit", "quit", "clear", "cls"]
+
+    def complete(text, state):
+        line = readline.get_line_buffer()
+        words = line[:readline.get_endidx()].split()
+        if line.endswith(" "):
+            words.append("")
+        if len(words) <= 1:
+            options = [w for w in shell_words if w.startswith(text)]
+        elif words[0] == "pck" and len(words) == 2:
+            options = [c for c in commands if c.startswith(text)]
+        else:
+            folder, prefix = os.path.split(text)
+            try:
+                entries = os.listdir(folder or ".")
+            except OSError:
+                entries = []
+            options = []
+            for name in sorted(entries):
+                if name.startswith(prefix):
+                    path = os.path.join(folder, name)
+                    options.append(path + os.sep if os.path.isdir(path) else path)
+        return options[state] if state < len(options) else None
+
+    readline.set_completer_delims(" \t\n")
+    readline.set_completer(complete)
+    readline.parse_and_bind("tab: complete")
+    return readline
+
 def interactive_shell():
+    from rich.panel import Panel
+
     console.print(Panel("[bold cyan]🐚 PCK Shell Active[/bold cyan]\nType 'exit' to quit.", expand=False))
+    readline = _setup_line_editing()
     while True:
         try:
             cwd = os.getcwd()
@@ -71,29 +163,51 @@ def interactive_shell():
                 os.system('cls' if os.name == 'nt' else 'clear')
                 continue
 
-            if user_input.lower().startswith("pck "):
+            if user_input.lower() == "pck" or user_input.lower().startswith("pck "):
                 args = shlex.split(user_input[4:])
-                
-                if getattr(sys, 'frozen', False):
-                    subprocess.run([sys.executable] + args)
-                else:
-                    subprocess.run([sys.executable, PCK_MAIN_SCRIPT] + args)
+                if not args:
+                    console.print("[dim]Already in the PCK shell. Try 'pck --help'.[/dim]")
+                    continue
+                dispatch_in_process(args)
                 continue
 
             subprocess.run(user_input, shell=True)
         except KeyboardInterrupt:
             break
+        except EOFError:
+            break
         except Exception as e:
             console.print(f"[bold red]Shell Error:[/bold red] {e}")
 
+    if readline:
+        try: readline.write_history_file(HISTORY_FILE)
+        except OSError: pass
+
 
 @app.callback(invoke_without_command=True)
-def main(ctx: typer.Context):
+def main(
+    ctx: typer.Context,
+    startup_profile: bool = typer.Option(False, "--startup-profile", help="Measure pck startup time and imports, then exit."),
+    trace_file: str = typer.Option(None, "--trace", help="Write a Chrome/Perfetto trace-event JSON of this command."),
+):
+    if startup_profile:
+        from src.startup import show_startup_profile
+        show_startup_profile(os.path.abspath(__file__))
+        raise typer.Exit()
+    if trace_file:
+        trace.enable(trace_file, name=f"pck {ctx.invoked_subcommand or 'shell'}")
+        ctx.call_on_close(lambda: console.print(f"[dim]Trace written to {trace.write()}[/dim]"))
+    if ctx.invoked_subcommand and ctx.invoked_subcommand != "stats":
+        history.start(ctx.invoked_subcommand)
+        ctx.call_on_close(history.finish)
     if ctx.invoked_subcommand is None:
+        history.discard()
         interactive_shell()
 
 @app.command()
 def version():
+    from importlib.metadata import version as get_version
+
     try:
         ver = get_version("pck")
     except:
@@ -107,12 +221,17 @@ def create(
     js: bool = typer.Option(False, "-js", "--js", help="Create Node.js project"),
     c: bool = typer.Option(False, "-c", help="Create C project"),
     cpp: bool = typer.Option(False, "-cpp", "--cpp", "-c++", help="Create C++ project"),
+    requirements: str = typer.Option(None, "-r", "--requirements", help="Python: base requirements baked into the venv template."),
+    template: bool = typer.Option(True, "--template/--no-template", help="Python: clone the venv from a warm template (default) or create it from scratch."),
 ):
     """
     Initialize environment. 
     Example: 'pck create -py 3.11 test' creates a folder 'test' with a Python 3.11 environment.
     """
-    
+    from src.download import ensure_tool_installed
+    from src import cpp_manager
+
+    config = get_config()
     cwd = os.getcwd()
     
     # Define target directory
@@ -130,19 +249,35 @@ def create(
 
     # --- PYTHON ---
     if py is not None:
+        history.note(lang="python")
         # Note: 'py' contains the version string (e.g., "3.11") or "default" if user handled differently
         uv_path = ensure_tool_installed("uv", config)
         console.print(f"[green]Creating Python environment in {target_dir}...[/green]")
+        python_version = py if py and py.lower() != "true" else None
+        requirements = os.path.abspath(requirements) if requirements else None
+
+        if template and not os.path.exists(os.path.join(target_dir, ".venv")):
+            from src import venv_templates
+
+            if venv_templates.create_from_template(config, uv_path, target_dir, python_version, requirements):
+                return
+            console.print("[yellow]Falling back to a fresh environment...[/yellow]")
         
         cmd = [uv_path, "venv", ".venv"]
         # If the user provided a specific version like "3.11", add it
-        if py and py.lower() != "true": 
-            cmd.extend(["--python", py])
+        if python_version:
+            cmd.extend(["--python", python_version])
             
-        run_command(cmd, cwd=target_dir)
+        if run_command(cmd, cwd=target_dir) == 0 and requirements:
+            python_path = get_python_executable(target_dir)
+            if not python_path:
+                console.print(f"[red]No Python interpreter found in {target_dir}/.venv: {requirements} was not installed.[/red]")
+                raise typer.Exit(1)
+            run_command([uv_path, "pip", "install", "--python", python_path, "-r", requirements])
 
     # --- NODE.JS ---
     elif js:
+        history.note(lang="js")
         ensure_tool_installed("node", config)
         npm_cmd = get_npm_command(config)
         console.print(f"[green]Initializing Node.js in {target_dir}...[/green]")
@@ -151,50 +286,122 @@ def create(
     # --- C / C++ ---
     elif c or cpp:
         lang = "cpp" if cpp else "c"
+        history.note(lang=lang)
         console.print(f"[green]Initializing {lang.upper()} environment in {target_dir}...[/green]")
         cpp_manager.create_project(config, target_dir, lang=lang)
 
     else:
         console.print("[red]Please specify a language flag (-py [ver], -js, -c, -cpp)[/red]")
 
+# A '#' starts a comment at the start of a line or after whitespace only: inside a
+# spec it is Conan's recipe revision (zlib/1.3.1#<rrev>) or an npm git ref (user/repo#v1.2)
+_comment_regex = re.compile(r'(?:^|\s)#.*')
+
+def read_requirements_file(path):
+    """Reads one package spec per line, ignoring blank lines and # comments."""
+    packages = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = _comment_regex.sub("", line).strip()
+            if line:
+                packages.append(line)
+    return packages
+
 @app.command()
-def install(package: str):
+def install(
+    packages: List[str] = typer.Argument(None, help="Packages to install (e.g. 'pck install requests rich')."),
+    requirements: str = typer.Option(None, "-r", "--requirements", help="File with one package per line."),
+):
+    """Install one or more packages with a single resolver run (uv, npm or conan)."""
+    from src.download import ensure_tool_installed
+    from src import cpp_manager
+
+    config = get_config()
     cwd = os.getcwd()
     files = os.listdir(cwd)
+    packages = list(packages or [])
+
+    if requirements:
+        if not os.path.exists(requirements):
+            console.print(f"[red]Requirements file not found: {requirements}[/red]")
+            raise typer.Exit(1)
+        file_packages = read_requirements_file(requirements)
+    else:
+        file_packages = []
+    label = " ".join(packages + file_packages) or "dependencies"
     
     # --- NODE.JS ---
     if "package.json" in files:
+        history.note(lang="js")
         ensure_tool_installed("node", config)
         npm_cmd = get_npm_command(config)
-        console.print(f"[green]Installing {package} via npm...[/green]")
-        run_command(npm_cmd + ["install", package])
+        console.print(f"[green]Installing {label} via npm...[/green]")
+        # Packages come from pck's shared store; plain npm install if it can't be used.
+        # Without packages, npm installs everything listed in package.json
+        from src import npm_store
+
+        exit_code = 0
+        status = npm_store.install(config, npm_cmd, cwd, packages + file_packages)
+        if status == npm_store.RESOLVE_FAILED:
+            # A plain npm install would fail the same way: node_modules is left as it was
+            console.print(f"[red]npm could not resolve {label}.[/red]")
+            exit_code = 1
+        elif status != npm_store.INSTALLED:
+            console.print("[yellow]Falling back to a regular npm install...[/yellow]")
+            # npm would write over files hardlinked from the store
+            if npm_store.is_store_linked(cwd):
+                npm_store.remove_node_modules(cwd)
+            exit_code = run_command(npm_cmd + ["install"] + packages + file_packages)
+        history.note(exit_code=exit_code)
         
     # --- PYTHON ---
     elif "pyproject.toml" in files or ".venv" in files or any(f.endswith(".py") for f in files):
+        history.note(lang="python")
         uv_path = ensure_tool_installed("uv", config)
-        console.print(f"[blue]Installing {package} via uv...[/blue]")
+        # uv reads requirement files itself (handles -e, markers, options...)
+        req_args = ["-r", requirements] if requirements else []
+        if not packages and not req_args:
+            if "requirements.txt" not in files:
+                console.print("[red]No package specified.[/red]")
+                history.note(exit_code=1)
+                return
+            req_args = ["-r", "requirements.txt"]
+            label = "requirements.txt"
+        console.print(f"[blue]Installing {label} via uv...[/blue]")
         
         # Check if we have a local environment to target specifically
         local_python = get_python_executable(cwd)
         
         if local_python:
             # Target the specific environment python
-            run_command([uv_path, "pip", "install", "--python", local_python, package])
+            exit_code = run_command([uv_path, "pip", "install", "--python", local_python] + packages + req_args)
         else:
             # Fallback to general install (might install in user scope or temp venv)
-            run_command([uv_path, "pip", "install", package])
+            exit_code = run_command([uv_path, "pip", "install"] + packages + req_args)
+        history.note(exit_code=exit_code)
         
     # --- C / C++ ---
     # Detection: source files, conanfile, or the store folder
     elif any(f.endswith(('.c', '.cpp')) for f in files) or "conanfile.txt" in files or os.path.exists(".conan_store"):
-        # Delegation to the C++ manager
-        cpp_manager.install_package(config, package)
+        # Delegation to the C++ manager (one Conan graph for every requirement)
+        history.note(lang="cpp" if any(f.endswith(".cpp") for f in files) else "c")
+        installed = cpp_manager.install_packages(config, packages + file_packages)
+        history.note(exit_code=0 if installed else 1)
 
     else:
         console.print("[red]Could not detect environment to install package.[/red]")
+        history.note(exit_code=1)
 
 @app.command()
-def run(script: str = typer.Argument(None, help="Script file")):
+def run(
+    script: str = typer.Argument(None, help="Script file"),
+    watch: bool = typer.Option(False, "-w", "--watch", help="Rebuild and restart on every source change."),
+    profile: str = typer.Option(None, "-p", "--profile", help="C/C++ build profile: dev, release or profile. Default: pck.yaml, else dev."),
+):
+    from src.download import ensure_tool_installed
+    from src import cpp_manager
+
+    config = get_config()
     cwd = os.getcwd()
     
     # Auto-detection of the script if not provided
@@ -217,25 +424,280 @@ def run(script: str = typer.Argument(None, help="Script file")):
         if local_python:
             # Run using the local environment directly
             console.print(f"[dim]Using local environment: {local_python}[/dim]")
-            run_command([local_python, script])
+            cmd = [local_python, script]
         else:
             # 2. Fallback to uv run (ephemeral or managed environment)
             console.print("[dim]No local .venv found, using uv run...[/dim]")
             uv_path = ensure_tool_installed("uv", config)
-            run_command([uv_path, "run", script])
+            cmd = [uv_path, "run", script]
+        lang = "python"
         
     # --- NODE.JS ---
     elif script.endswith(".js"):
         ensure_tool_installed("node", config)
         node_path = get_tool_path("node", config)
-        run_command([node_path, script])
+        cmd = [node_path, script]
+        lang = "js"
         
     # --- C / C++ ---
     elif script.endswith(".c") or script.endswith(".cpp"):
-        cpp_manager.run_script(config, script)
+        history.note(lang="cpp" if script.endswith(".cpp") else "c")
+        build_profile = resolve_profile(cwd, profile)
+        if not watch:
+            returncode = cpp_manager.run_script(config, script, build_profile)
+            history.note(exit_code=1 if returncode is None else returncode)
+            return
+        lang = "c"
         
     else:
         console.print(f"[red]Unknown file type: {script}[/red]")
+        return
+
+    if lang != "c":
+        history.note(lang=lang)
+    if not watch:
+        with trace.span("execute"):
+            history.note(exit_code=run_command(cmd))
+        return
+
+    # --- WATCH MODE ---
+    # Interpreter/toolchain stay resolved; only the C/C++ build is redone per change
+    from src import watch as watcher
+
+    # A watch session lasts as long as the user wants: its duration would skew 'pck stats'
+    history.discard()
+
+    if lang == "c":
+        prepare = lambda: cpp_manager.prepare_run(config, script, build_profile)
+    else:
+        cmd = [str(c) for c in cmd]
+        prepare = lambda: (cmd, None)
+    watcher.run_watch(prepare, cwd, watcher.EXTENSIONS[lang])
+
+@app.command()
+def build(
+    output: str = typer.Option(None, "-o", "--output", help="Executable path. Default: build/<profile>/<folder>"),
+    jobs: int = typer.Option(None, "-j", "--jobs", help="Parallel compile jobs. Default: all cores."),
+    profile: str = typer.Option(None, "-p", "--profile", help="Build profile: dev, release or profile. Default: pck.yaml, else dev."),
+    targets: str = typer.Option(None, "-t", "--targets", help="Comma-separated zig triples, e.g. x86_64-linux-gnu,aarch64-macos. Default: this machine."),
+):
+    """Incrementally build every C/C++ file of the project into one executable per target."""
+    from src import builder
+
+    build_profile = resolve_profile(os.getcwd(), profile)
+    target_list = [t.strip() for t in targets.split(",") if t.strip()] if targets else None
+    if not builder.build_project(get_config(), os.getcwd(), output=output, jobs=jobs, profile=build_profile, targets=target_list):
+        raise typer.Exit(1)
+
+def _test_runners(config, cwd, langs, profile):
+    """
+    {lang: test -> (cmd, env) or (None, error)} for the languages present.
+    Interpreters and the toolchain are resolved here, once, before the pool starts.
+    """
+    from src.download import ensure_tool_installed
+
+    def require(tool_name):
+        path = ensure_tool_installed(tool_name, config)
+        if not path:
+            console.print(f"[bold red]❌ Could not install {tool_name}: the tests cannot run.[/bold red]")
+            raise typer.Exit(1)
+        return path
+
+    runners = {}
+    if "python" in langs:
+        local_python = get_python_executable(cwd)
+        python = [local_python] if local_python else [require("uv"), "run", "python"]
+        has_pytest = subprocess.run(python + ["-c", "import pytest"], cwd=cwd,
+                                    capture_output=True).returncode == 0
+        module = ["-m", "pytest", "-q"] if has_pytest else ["-m", "unittest"]
+        runners["python"] = lambda test: (python + module + [os.path.relpath(test["path"], cwd)], None)
+
+    if "js" in langs:
+        node_path = require("node")
+        runners["js"] = lambda test: ([node_path, "--test", test["path"]], None)
+
+    if "c" in langs:
+        from src import cpp_manager
+
+        zig_path = ensure_tool_installed("zig", config)
+        _, _, bin_dirs = cpp_manager.load_target_deps(cwd)
+
+        def run_c(test):
+            if not zig_path:
+                return None, "Zig is not installed: the C/C++ test cannot be compiled."
+            exe_name, env, error, _ = cpp_manager.build_script(config, os.path.relpath(test["path"], cwd), profile)
+            if not exe_name:
+                return None, f"Compilation failed:\n{error}"
+            env["PATH"] = os.pathsep.join(bin_dirs + [env["PATH"]])
+            return [os.path.join(cwd, exe_name)], env
+        runners["c"] = run_c
+    return runners
+
+@app.command()
+def test(
+    paths: List[str] = typer.Argument(None, help="Test files or folders. Default: the whole project."),
+    jobs: int = typer.Option(None, "-j", "--jobs", help="Tests run at once. Default: all cores."),
+    junit: str = typer.Option(None, "--junit", help="JUnit XML report path. Default: .pck_cache/junit.xml"),
+    profile: str = typer.Option(None, "-p", "--profile", help="C/C++ build profile for test_*.c files."),
+    timeout: float = typer.Option(None, "--timeout", help="Seconds before a test is stopped and reported as an error."),
+):
+    """Discover and run the project's Python, JS and C/C++ tests in parallel."""
+    from src import tester
+
+    cwd = os.getcwd()
+    tests = tester.discover(cwd, paths)
+    if not tests:
+        console.print("[yellow]No tests found.[/yellow]")
+        return
+
+    langs = {t["lang"] for t in tests}
+    build_profile = resolve_profile(cwd, profile) if "c" in langs else None
+    runners = _test_runners(get_config(), cwd, langs, build_profile)
+
+    console.print(f"[bold cyan]🧪 Running {len(tests)} test file(s)...[/bold cyan]")
+    start = time.perf_counter()
+    results = tester.run_tests(tests, runners, cwd, jobs=jobs, timeout=timeout)
+    elapsed = time.perf_counter() - start
+    report = tester.write_junit(results, junit or os.path.join(cwd, tester.JUNIT_FILE), elapsed)
+
+    failed = [r for r in results if r["status"] != "passed"]
+    color = "red" if failed else "green"
+    console.print(f"[bold {color}]{len(results) - len(failed)} passed, {len(failed)} failed[/bold {color}] "
+                  f"[dim]in {elapsed:.2f}s, report: {os.path.relpath(report, cwd)}[/dim]")
+    if failed:
+        raise typer.Exit(1)
+
+@tools_app.command("list")
+def tools_list():
+    """List toolchains in the store, least recently used first."""
+    from rich.table import Table
+    from src import store
+
+    entries = store.list_entries(get_config())
+    if not entries:
+        console.print("[dim]The tool store is empty.[/dim]")
+        return
+
+    table = Table(title="Tool store")
+    table.add_column("Entry")
+    table.add_column("Size", justify="right")
+    table.add_column("Last use")
+    table.add_column("Active")
+    for e in entries:
+        table.add_row(e["name"], store.format_size(e["size"]), store.describe_age(e["last_use"]), "✅" if e["active"] else "")
+    console.print(table)
+    console.print(f"[bold]Total:[/bold] {store.format_size(sum(e['size'] for e in entries))}")
+
+@tools_app.command("gc")
+def tools_gc(
+    max_size: str = typer.Option(..., "--max-size", help="Size budget for the store (e.g. 500M, 5G)."),
+    dry_run: bool = typer.Option(False, "--dry-run", help="Only show what would be evicted."),
+):
+    """Evict least recently used toolchains until the store fits in --max-size."""
+    from src import store
+
+    try:
+        budget = store.parse_size(max_size)
+    except ValueError as e:
+        console.print(f"[red]{e}[/red]")
+        raise typer.Exit(1)
+
+    evicted, remaining = store.gc(get_config(), budget, dry_run=dry_run)
+    verb = "Would evict" if dry_run else "Evicted"
+    for e in evicted:
+        console.print(f"[yellow]🗑️  {verb} {e['name']} ({store.format_size(e['size'])}, last used {store.describe_age(e['last_use'])})[/yellow]")
+    if not evicted:
+        console.print("[green]Nothing to evict.[/green]")
+    console.print(f"[bold]Store size:[/bold] {store.format_size(remaining)}")
+    if remaining > budget:
+        console.print("[dim]Remaining entries are used by the current config.yaml and were kept.[/dim]")
+
+def _format_ms(ms):
+    if ms is None:
+        return "-"
+    return f"{ms:.0f} ms" if ms < 1000 else f"{ms / 1000:.2f} s"
+
+@app.command()
+def stats(
+    command: str = typer.Option(None, "-c", "--command", help="Only this command (run, install, build...)."),
+    here: bool = typer.Option(False, "--here", help="Only runs made in the current folder."),
+    days: int = typer.Option(None, "--days", help="Only the last N days."),
+):
+    """Timing history of pck commands: p50/p95 per command and project, with regression flags."""
+    from rich.table import Table
+
+    since = time.time() - days * 86400 if days else None
+    runs = history.load_runs(command=command, project=os.getcwd() if here else None, since=since)
+    if not runs:
+        console.print(f"[dim]No recorded runs yet ({history.get_db_path()}).[/dim]")
+        return
+
+    table = Table(title="pck timing history")
+    table.add_column("Command")
+    table.add_column("Project")
+    table.add_column("Runs", justify="right")
+    table.add_column("p50", justify="right")
+    table.add_column("p95", justify="right")
+    table.add_column("Last", justify="right")
+    table.add_column("Cache hits", justify="right")
+    table.add_column("Status")
+    regressions = 0
+    for row in history.summarize(runs):
+        status = "[green]ok[/green]"
+        if row["regression"]:
+            ratio, phase = row["regression"]
+            status = f"[bold red]⚠ +{(ratio - 1) * 100:.0f}%[/bold red]" + (f" [red]({phase})[/red]" if phase else "")
+            regressions += 1
+        elif row["failures"]:
+            status = f"[yellow]{row['failures']} failed[/yellow]"
+        hit_rate = row["cache_hit_rate"]
+        table.add_row(
+            row["command"], os.path.basename(row["project"]) or row["project"], str(row["runs"]),
+            _format_ms(row["p50"]), _format_ms(row["p95"]), _format_ms(row["last"]),
+            f"{hit_rate:.0%}" if hit_rate is not None else "-", status,
+        )
+    console.print(table)
+    if regressions:
+        console.print(f"[dim]⚠ = median of the last {history.RECENT_RUNS} successful runs is more than "
+                      f"{history.REGRESSION_THRESHOLD:.0%} above the {history.BASELINE_RUNS} before them; "
+                      f"the phase that grew the most is shown.[/dim]")
+
+@bundle_app.command("export")
+def bundle_export(
+    output: str = typer.Argument("pck-bundle.zip", help="Bundle file to write."),
+):
+    """Pack installed tools, Conan binaries and uv/npm caches into one deduplicated archive."""
+    from src import bundle, store
+
+    summary = bundle.export_bundle(get_config(), output)
+    if not summary:
+        raise typer.Exit(1)
+    for kind, name in summary["sections"]:
+        console.print(f"[dim]  {kind}: {name}[/dim]")
+    console.print(f"[bold green]✅ {output}: {summary['files']} files ({store.format_size(summary['size'])}), "
+                  f"{summary['blobs']} unique, {store.format_size(summary['archive_size'])} compressed[/bold green]")
+
+@bundle_app.command("import")
+def bundle_import(
+    path: str = typer.Argument(..., help="Bundle file made by 'pck bundle export'."),
+):
+    """Unpack a bundle into the tool store and package caches, for offline use."""
+    from src import bundle
+    from src.utils import OFFLINE_MARKER
+
+    if not os.path.isfile(path):
+        console.print(f"[red]Bundle not found: {path}[/red]")
+        raise typer.Exit(1)
+    try:
+        results = bundle.import_bundle(get_config(), path)
+    except (ValueError, KeyError, OSError) as e:
+        console.print(f"[bold red]Error importing {path}: {e}[/bold red]")
+        raise typer.Exit(1)
+    for kind, name, status in results:
+        console.print(f"  {kind}: {name} [dim]{status}[/dim]")
+    console.print("[bold green]✅ Bundle imported.[/bold green]")
+    console.print(f"[dim]uv and npm now run offline; set PCK_OFFLINE=0 or delete "
+                  f"{os.path.join(get_config()['settings']['base_dir'], OFFLINE_MARKER)} to go back online.[/dim]")
 
 if __name__ == "__main__":
     app()
\ No newline at end of file
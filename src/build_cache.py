@@ -0,0 +1,136 @@
+import os
+import re
+import json
+import hashlib
+import threading
+
+# Stamps live in <project>/.pck_cache/build/<output name>.json
+BUILD_CACHE_DIR = ".pck_cache"
+
+# Translation unit extensions (lower case), shared by pck build, run and test
+C_EXTENSIONS = (".c",)
+CPP_EXTENSIONS = (".cpp", ".cc", ".cxx")
+
+_include_regex = re.compile(r'^\s*#\s*include\s*([<"])([^>"]+)[>"]', re.MULTILINE)
+
+def get_include_dirs(cflags):
+    """Extracts the -I directories from a flag vector (both '-Idir' and '-I dir' forms)."""
+    dirs = []
+    i = 0
+    while i < len(cflags):
+        arg = cflags[i]
+        if arg == "-I" and i + 1 < len(cflags):
+            dirs.append(cflags[i + 1])
+            i += 1
+        elif arg.startswith("-I"):
+            dirs.append(arg[2:])
+        i += 1
+    return dirs
+
+def scan_includes(source_path, include_dirs):
+    """
+    Returns every file reachable from source_path through #include, source included.
+    Headers that cannot be resolved (system headers from zig's libc) are ignored.
+    """
+    seen = {}
+    stack = [os.path.abspath(source_path)]
+    while stack:
+        path = stack.pop()
+        if path in seen:
+            continue
+        try:
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                text = f.read()
+        except OSError:
+            continue
+        seen[path] = True
+
+        for kind, name in _include_regex.findall(text):
+            candidates = [os.path.dirname(path)] + include_dirs if kind == '"' else include_dirs
+            for base in candidates:
+                candidate = os.path.abspath(os.path.join(base, name))
+                if os.path.isfile(candidate):
+                    if candidate not in seen:
+                        stack.append(candidate)
+                    break
+    return list(seen)
+
+def file_identity(path):
+    """Cheap change detector: (mtime_ns, size) or None if the file is gone."""
+    try:
+        st = os.stat(path)
+        return [st.st_mtime_ns, st.st_size]
+    except OSError:
+        return None
+
+def hash_files(paths):
+    hasher = hashlib.sha256()
+    for path in sorted(paths):
+        hasher.update(path.encode("utf-8"))
+        try:
+            with open(path, "rb") as f:
+                hasher.update(hashlib.sha256(f.read()).digest())
+        except OSError:
+            hasher.update(b"<missing>")
+    return hasher.hexdigest()
+
+def command_key(cmd, compiler_path, inputs=()):
+    """
+    Hash of the full flag vector plus the compiler identity (path, size, mtime),
+    and the identity of extra inputs the command reads (linked libraries...).
+    """
+    hasher = hashlib.sha256()
+    hasher.update(json.dumps([str(c) for c in cmd]).encode("utf-8"))
+    hasher.update(json.dumps([os.path.abspath(compiler_path), file_identity(compiler_path)]).encode("utf-8"))
+    if inputs:
+        hasher.update(json.dumps([[path, file_identity(path)] for path in inputs]).encode("utf-8"))
+    return hasher.hexdigest()
+
+def get_stamp_path(project_dir, output_path):
+    # Outputs of different profiles share a file name: the full path tells them apart
+    name = os.path.basename(output_path)
+    path_hash = hashlib.sha256(os.path.abspath(os.path.join(project_dir, output_path)).encode("utf-8")).hexdigest()[:8]
+    return os.path.join(project_dir, BUILD_CACHE_DIR, "build", f"{name}-{path_hash}.json")
+
+def _read_stamp(stamp_path):
+    try:
+        with open(stamp_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_stamp(stamp_path, key, source_path, include_dirs):
+    inputs = scan_includes(source_path, include_dirs)
+    stamp = {
+        "key": key,
+        "content": hash_files(inputs),
+        "inputs": {p: file_identity(p) for p in inputs},
+    }
+    os.makedirs(os.path.dirname(stamp_path), exist_ok=True)
+    tmp_path = f"{stamp_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(stamp, f)
+    os.replace(tmp_path, stamp_path)
+
+def is_up_to_date(stamp_path, output_path, key, source_path, include_dirs):
+    """
+    True when output_path was built from the same inputs with the same command.
+    Fast path only stats the recorded inputs; contents are re-hashed when a
+    timestamp moved, so touching a file without editing it is still a hit.
+    """
+    if not os.path.exists(output_path):
+        return False
+    stamp = _read_stamp(stamp_path)
+    if not stamp or stamp.get("key") != key:
+        return False
+
+    inputs = stamp.get("inputs", {})
+    if inputs and all(file_identity(p) == ident for p, ident in inputs.items()):
+        return True
+
+    if hash_files(scan_includes(source_path, include_dirs)) != stamp.get("content"):
+        return False
+
+    # Same content, new timestamps: refresh the stamp so the next check is fast again
+    write_stamp(stamp_path, key, source_path, include_dirs)
+    return True
@@ -0,0 +1,256 @@
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from rich.console import Console
+from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, MofNCompleteColumn
+from src.download import ensure_tool_installed
+from src import build_cache
+from src import history
+from src import trace
+from src import profiles
+from src.tester import is_test_source
+from src.cpp_manager import (
+    DEPS_DIR, LOCAL_CONAN_DIR, ZIG_CACHE_DIR, WRAPPERS_DIR, BUILD_DIR,
+    load_target_deps, get_base_flags, get_link_flags, get_compile_env, get_profile_dir, zig_cache_guard,
+    host_target, exe_suffix, linked_libraries,
+)
+
+console = Console()
+
+C_EXTENSIONS = build_cache.C_EXTENSIONS
+CPP_EXTENSIONS = build_cache.CPP_EXTENSIONS
+OBJ_DIR = "obj"
+OBJ_MANIFEST = ".pck_objects.json"
+
+# Folders that never contain project translation units
+SKIP_DIRS = {DEPS_DIR, LOCAL_CONAN_DIR, ZIG_CACHE_DIR, WRAPPERS_DIR, BUILD_DIR,
+             build_cache.BUILD_CACHE_DIR, ".venv", "node_modules", ".git"}
+
+def discover_sources(project_dir):
+    """
+    Returns every C/C++ translation unit of the project, relative to project_dir.
+    'pck test' entry points (test_*.c...) have their own main() and are left out.
+    """
+    sources = []
+    for root, dirs, files in os.walk(project_dir):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS and not d.startswith("."))
+        for name in sorted(files):
+            if name.lower().endswith(C_EXTENSIONS + CPP_EXTENSIONS) and not is_test_source(name):
+                sources.append(os.path.relpath(os.path.join(root, name), project_dir))
+    return sources
+
+def parse_depfile(depfile_path):
+    """Parses a Makefile-style depfile written by '-MD -MF'. Returns the prerequisite list, or None."""
+    try:
+        with open(depfile_path, "r", encoding="utf-8", errors="ignore") as f:
+            content = f.read()
+    except OSError:
+        return None
+
+    content = content.replace("\\\r\n", " ").replace("\\\n", " ")
+    # "target: deps" -- skip drive letters like C:\\ by requiring a space after the colon
+    sep = content.find(": ")
+    if sep == -1:
+        return None
+    deps_part = content[sep + 2:]
+
+    deps = []
+    current = ""
+    i = 0
+    while i < len(deps_part):
+        ch = deps_part[i]
+        if ch == "\\" and i + 1 < len(deps_part) and deps_part[i + 1] == " ":
+            current += " "
+            i += 2
+            continue
+        if ch.isspace():
+            if current:
+                deps.append(current)
+                current = ""
+        else:
+            current += ch
+        i += 1
+    if current:
+        deps.append(current)
+    return deps
+
+def _is_stale(obj_path, depfile_path, key, previous_key):
+    if key != previous_key or not os.path.exists(obj_path):
+        return True
+    deps = parse_depfile(depfile_path)
+    if deps is None:
+        return True
+    obj_mtime = os.path.getmtime(obj_path)
+    for dep in deps:
+        try:
+            if os.path.getmtime(dep) > obj_mtime:
+                return True
+        except OSError:
+            return True
+    return False
+
+def _load_manifest(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _plan_target(project_dir, zig_path, sources, profile, target, output):
+    """Objects to (re)compile and the link step of one target. Returns a plan dict."""
+    is_cpp = any(src.lower().endswith(CPP_EXTENSIONS) for src in sources)
+    cflags, libs_flags, _ = load_target_deps(project_dir, target)
+
+    build_dir = get_profile_dir(project_dir, profile, target)
+    obj_root = os.path.join(build_dir, OBJ_DIR)
+    manifest_path = os.path.join(obj_root, OBJ_MANIFEST)
+    manifest = _load_manifest(manifest_path)
+    exe_path = output or os.path.join(build_dir, os.path.basename(project_dir) + exe_suffix(target))
+
+    jobs_list = []
+    objects = []
+    new_manifest = {}
+    for src in sources:
+        src_is_cpp = src.lower().endswith(CPP_EXTENSIONS)
+        obj_path = os.path.join(obj_root, src + ".o")
+        depfile_path = os.path.join(obj_root, src + ".d")
+        cmd = [zig_path, "c++" if src_is_cpp else "cc", "-c", os.path.join(project_dir, src)] \
+            + get_base_flags(src_is_cpp, profile, target) + cflags \
+            + ["-MD", "-MF", depfile_path, "-o", obj_path]
+        key = build_cache.command_key(cmd, zig_path)
+        new_manifest[src] = key
+        objects.append(obj_path)
+        if _is_stale(obj_path, depfile_path, key, manifest.get(src)):
+            jobs_list.append((src, obj_path, cmd))
+
+    link_cmd = [zig_path, "c++" if is_cpp else "cc"] + objects + get_link_flags(is_cpp, profile, target) + libs_flags + ["-o", exe_path]
+    link_key = build_cache.command_key(link_cmd, zig_path, linked_libraries(libs_flags))
+    return {
+        "target": target,
+        "label": target or host_target(),
+        "exe_path": exe_path,
+        "obj_root": obj_root,
+        "manifest_path": manifest_path,
+        "new_manifest": new_manifest,
+        "jobs": jobs_list,
+        "link_cmd": link_cmd,
+        "link_key": link_key,
+        "up_to_date": not jobs_list and os.path.exists(exe_path) and manifest.get("<link>") == link_key,
+        "failures": [],
+    }
+
+def _save_manifest(plan):
+    os.makedirs(plan["obj_root"], exist_ok=True)
+    with open(plan["manifest_path"], "w", encoding="utf-8") as f:
+        json.dump(plan["new_manifest"], f)
+
+def build_project(config, project_dir=None, output=None, jobs=None, profile=None, targets=None):
+    """
+    Incremental, parallel build of every translation unit of the project.
+    Objects go to build/<profile>/obj, header dependencies are tracked through depfiles,
+    only stale objects are recompiled and the executable is linked once.
+    targets is a list of zig triples (host when empty): their objects compile in
+    one shared pool, each into build/<profile>/<target>, sharing .zig-cache.
+    Returns the executable paths, or None on failure.
+    """
+    project_dir = os.path.abspath(project_dir or os.getcwd())
+    profile = profile or profiles.resolve(project_dir)
+    targets = list(dict.fromkeys(targets or [None]))
+    if output and len(targets) > 1:
+        console.print("[red]--output can only be used with a single target.[/red]")
+        return None
+    sources = discover_sources(project_dir)
+    if not sources:
+        console.print("[red]No C/C++ sources found.[/red]")
+        return None
+    history.note(lang="cpp" if any(src.lower().endswith(CPP_EXTENSIONS) for src in sources) else "c")
+
+    zig_path = ensure_tool_installed("zig", config)
+    if not zig_path:
+        return None
+
+    # One .zig-cache for every target: libc/runtime builds are kept per target inside it
+    env = get_compile_env(project_dir)
+    multi = len(targets) > 1
+
+    # --- PLAN ---
+    plans = [_plan_target(project_dir, zig_path, sources, profile, target, output) for target in targets]
+    for plan in plans:
+        trace.count("build_cache_hit", len(sources) - len(plan["jobs"]))
+        trace.count("build_cache_miss", len(plan["jobs"]))
+        if plan["up_to_date"]:
+            console.print(f"[green]✅ {os.path.relpath(plan['exe_path'], project_dir)} is up to date.[/green]")
+    pending = [plan for plan in plans if not plan["up_to_date"]]
+    if not pending:
+        return [plan["exe_path"] for plan in plans]
+
+    workers = max(1, jobs or os.cpu_count() or 1)
+    # The first build of a project fills .zig-cache (libc, runtime): concurrent pck processes wait for it
+    on_wait = lambda: console.print(f"[dim]⏳ Waiting for another pck process to fill {ZIG_CACHE_DIR}...[/dim]")
+    with zig_cache_guard(project_dir, [plan["target"] for plan in pending], on_wait) as seeded, \
+            ThreadPoolExecutor(max_workers=workers) as pool:
+        # --- COMPILE (parallel, every target in the same pool) ---
+        jobs_list = [(plan, job) for plan in pending for job in plan["jobs"]]
+        if jobs_list:
+            with Progress(
+                SpinnerColumn(),
+                TextColumn("[bold blue]Compiling"),
+                BarColumn(),
+                MofNCompleteColumn(),
+                TextColumn("{task.description}"),
+                transient=True
+            ) as progress:
+                task_id = progress.add_task("", total=len(jobs_list))
+
+                def compile_one(src, obj_path, cmd):
+                    os.makedirs(os.path.dirname(obj_path), exist_ok=True)
+                    return trace.run(cmd, env=env, capture_output=True, text=True, cwd=project_dir)
+
+                # Threads only wait on compiler processes, so they give full multi-core parallelism
+                with trace.span("compile", units=len(jobs_list)):
+                    futures = {pool.submit(compile_one, *job): (plan, job[0]) for plan, job in jobs_list}
+                    for future in as_completed(futures):
+                        plan, src = futures[future]
+                        ret = future.result()
+                        progress.update(task_id, advance=1, description=f"{src} [{plan['label']}]" if multi else src)
+                        if ret.returncode != 0:
+                            plan["failures"].append((src, ret.stderr))
+                            plan["new_manifest"].pop(src, None)
+
+            failed = sum(len(plan["failures"]) for plan in pending)
+            console.print(f"[dim]Compiled {len(jobs_list) - failed}/{len(jobs_list)} translation unit(s) "
+                          f"({len(sources) * len(plans) - len(jobs_list)} up to date).[/dim]")
+
+        for plan in pending:
+            if not plan["failures"]:
+                seeded(plan["target"])
+            else:
+                _save_manifest(plan)
+                console.print(f"[bold red]💥 Compilation failed{' for ' + plan['label'] if multi else ''}![/bold red]")
+                for src, err in plan["failures"]:
+                    console.print(f"[red]--- {src} ---[/red]")
+                    console.print(err)
+
+        # --- LINK (targets in parallel) ---
+        to_link = [plan for plan in pending if not plan["failures"]]
+        if to_link:
+            with Progress(SpinnerColumn(), TextColumn("[bold blue]Linking {task.description}..."), transient=True) as progress:
+                progress.add_task(description=", ".join(os.path.basename(p["exe_path"]) for p in to_link), total=None)
+                with trace.span("link", targets=len(to_link)):
+                    link = lambda plan: trace.run(plan["link_cmd"], env=env, capture_output=True, text=True, cwd=project_dir)
+                    results = list(pool.map(link, to_link))
+        else:
+            results = []
+
+    ok = all(not plan["failures"] for plan in pending)
+    for plan, ret in zip(to_link, results):
+        if ret.returncode != 0:
+            console.print(f"[bold red]💥 Link failed{' for ' + plan['label'] if multi else ''}![/bold red]")
+            console.print(ret.stderr)
+            ok = False
+            continue
+        plan["new_manifest"]["<link>"] = plan["link_key"]
+        _save_manifest(plan)
+        console.print(f"[bold green]✅ Built {os.path.relpath(plan['exe_path'], project_dir)}[/bold green]")
+
+    return [plan["exe_path"] for plan in plans] if ok else None
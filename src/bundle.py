@@ -0,0 +1,332 @@
+import os
+import json
+import stat
+import time
+import shutil
+import hashlib
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from rich.console import Console
+from rich.progress import Progress
+from src import conan_cache
+from src import extract
+from src import locks
+from src import npm_store
+from src import trace
+from src.store import get_entry_dir, get_entry_lock_path, get_store_root, store_key, touch_entry
+from src.utils import OFFLINE_MARKER, get_npm_command, get_tool_path
+
+console = Console()
+
+# Offline bundles: everything a machine needs to run pck without network, in one zip.
+#   manifest.json        sections (what goes where) and, per file, its blob
+#   blobs/<sha256>[-x]   each distinct content once ('-x': executable)
+# Sections:
+#   tool      one tool store entry per tool of config.yaml that is installed, with its
+#             store key and URL: imported only where config.yaml names the same version
+#   conan     the shared Conan binary cache (see conan_cache.py)
+#   npm       the global npm package store
+#   npm_cache npm's own cache ('npm config get cache'): the registry metadata npm
+#             needs to resolve package-lock.json without network
+#   uv        uv's own cache ('uv cache dir')
+# Import extracts the blobs in parallel (src/extract.py), then hardlinks them into
+# place. Existing files and tool/npm store entries are kept: importing twice is harmless.
+# It also leaves OFFLINE_MARKER in base_dir: uv and npm then run offline (see utils.py).
+MANIFEST_NAME = "manifest.json"
+BLOBS_DIR = "blobs"
+MANIFEST_VERSION = 1
+HASH_CHUNK = 1024 * 1024
+
+# Already compressed: deflating them again costs time for nothing
+STORED_SUFFIXES = (".zip", ".tgz", ".gz", ".xz", ".bz2", ".zst", ".whl", ".jar", ".7z", ".png", ".jpg")
+
+# --- SOURCES ---
+def _uv_cache_dir(config):
+    """uv's cache folder, asked to the provisioned uv (None when uv isn't installed)."""
+    uv_path = os.path.join(get_entry_dir("uv", config), config['tools']['uv']['exe_path']) \
+        if "uv" in config['tools'] else None
+    if not uv_path or not os.path.exists(uv_path):
+        return None
+    ret = trace.run([uv_path, "cache", "dir"], capture_output=True, text=True)
+    path = ret.stdout.strip()
+    return path if ret.returncode == 0 and path else None
+
+def _npm_cache_dir(config):
+    """npm's cache folder, asked to the provisioned npm (None when node isn't installed)."""
+    if "node" not in config['tools'] or not os.path.exists(get_tool_path("node", config)):
+        return None
+    ret = trace.run(get_npm_command(config) + ["config", "get", "cache"], capture_output=True, text=True)
+    path = ret.stdout.strip()
+    return path if ret.returncode == 0 and path else None
+
+# Per machine, asked to the installed tool itself
+_CACHE_DIRS = {"uv": _uv_cache_dir, "npm_cache": _npm_cache_dir}
+
+def _sections(config):
+    """[{"kind", "name", "path"}] of the folders to bundle that exist on this machine."""
+    sections = []
+    for name, tool_conf in config['tools'].items():
+        entry_dir = get_entry_dir(name, config)
+        if os.path.exists(os.path.join(entry_dir, tool_conf['exe_path'])):
+            sections.append({"kind": "tool", "name": name, "path": entry_dir,
+                             "key": store_key(tool_conf), "url": tool_conf['url']})
+
+    sources = [
+        ("conan", conan_cache.get_shared_root(config)),
+        ("npm", npm_store.get_store_root(config)),
+        ("npm_cache", _npm_cache_dir(config)),
+        ("uv", _uv_cache_dir(config)),
+    ]
+    for kind, path in sources:
+        if path and os.path.isdir(path):
+            sections.append({"kind": kind, "name": kind, "path": path})
+    return sections
+
+def _destination(section, config, cache_dirs):
+    """Where a section goes on this machine: (path, None) or (None, reason to skip it)."""
+    kind, name = section["kind"], section["name"]
+    if kind == "tool":
+        if name not in config['tools']:
+            return None, "not in config.yaml"
+        if section.get("key") != store_key(config['tools'][name]):
+            # Same tool name, other version: the entry would be published under the wrong key
+            return None, f"config.yaml wants another version than {section.get('url') or 'the bundled one'}"
+        return get_entry_dir(name, config), None
+    if kind == "conan":
+        return conan_cache.get_shared_root(config) or \
+            os.path.join(config['settings']['base_dir'], conan_cache.DEFAULT_SHARED_DIR), None
+    if kind == "npm":
+        return npm_store.get_store_root(config), None
+    if kind in _CACHE_DIRS:
+        if kind not in cache_dirs:
+            cache_dirs[kind] = _CACHE_DIRS[kind](config)
+        tool = "uv" if kind == "uv" else "node"
+        return cache_dirs[kind], None if cache_dirs[kind] else f"{tool} is not installed"
+    return None, "destination unknown"
+
+# --- EXPORT ---
+def _hash_file(path):
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            hasher.update(chunk)
+    executable = os.name != "nt" and os.stat(path).st_mode & stat.S_IXUSR
+    return hasher.hexdigest() + ("-x" if executable else "")
+
+def _scan(root):
+    """(files, links, dirs) of a tree, paths relative to root with '/' separators."""
+    files, links, dirs = [], {}, []
+    for folder, subdirs, names in os.walk(root):
+        rel_folder = os.path.relpath(folder, root)
+        for name in list(subdirs):
+            if os.path.islink(os.path.join(folder, name)):
+                subdirs.remove(name)
+                names.append(name)
+        if rel_folder != ".":
+            dirs.append(rel_folder.replace(os.sep, "/"))
+        for name in names:
+            path = os.path.join(folder, name)
+            rel_path = os.path.normpath(os.path.join(rel_folder, name)).replace(os.sep, "/")
+            if os.path.islink(path):
+                links[rel_path] = os.readlink(path)
+            elif os.path.isfile(path):
+                files.append(rel_path)
+    return files, links, dirs
+
+def export_bundle(config, output_path, workers=None):
+    """
+    Packs the provisioned tools and package caches into output_path.
+    Returns the manifest summary dict, or None when there is nothing to export.
+    """
+    sections = _sections(config)
+    if not sections:
+        console.print("[yellow]Nothing to export: no tool installed and no package cache found.[/yellow]")
+        return None
+
+    workers = workers or extract.default_workers() * 2
+    manifest = {"version": MANIFEST_VERSION, "created": time.time(), "sections": []}
+    blobs = {}  # blob name -> one source path
+    total_size = 0
+
+    with Progress(console=console, transient=True) as progress:
+        task = progress.add_task("[cyan]Hashing...", total=None)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for section in sections:
+                root = section["path"]
+                files, links, dirs = _scan(root)
+                progress.update(task, description=f"[cyan]Hashing {section['name']}...")
+                hashes = pool.map(lambda rel: _hash_file(os.path.join(root, rel)), files)
+                entry_files = {}
+                for rel_path, blob in zip(files, hashes):
+                    entry_files[rel_path] = blob
+                    if blob not in blobs:
+                        blobs[blob] = os.path.join(root, rel_path)
+                    total_size += os.path.getsize(os.path.join(root, rel_path))
+                manifest["sections"].append({
+                    **{k: v for k, v in section.items() if k != "path"},
+                    "files": entry_files, "links": links, "dirs": dirs,
+                })
+
+        progress.update(task, description="[cyan]Compressing...", total=len(blobs), completed=0)
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        tmp_path = f"{output_path}.{os.getpid()}.tmp"
+        try:
+            with zipfile.ZipFile(tmp_path, "w", allowZip64=True) as zf:
+                zf.writestr(MANIFEST_NAME, json.dumps(manifest), compress_type=zipfile.ZIP_DEFLATED)
+                for blob, source in blobs.items():
+                    info = zipfile.ZipInfo.from_file(source, f"{BLOBS_DIR}/{blob}")
+                    info.create_system = 3  # Unix mode bits are read back by extract.py
+                    info.external_attr = (0o755 if blob.endswith("-x") else 0o644) << 16
+                    stored = source.lower().endswith(STORED_SUFFIXES)
+                    info.compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+                    with open(source, "rb") as src, zf.open(info, "w", force_zip64=True) as dst:
+                        shutil.copyfileobj(src, dst, HASH_CHUNK)
+                    progress.update(task, advance=1)
+            os.replace(tmp_path, output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    return {
+        "sections": [(s["kind"], s["name"]) for s in manifest["sections"]],
+        "files": sum(len(s["files"]) for s in manifest["sections"]),
+        "blobs": len(blobs),
+        "size": total_size,
+        "archive_size": os.path.getsize(output_path),
+    }
+
+# --- IMPORT ---
+def _place(blob_path, target):
+    """Hardlinks (or copies across devices) a blob to target. Never replaces an existing file."""
+    if os.path.lexists(target):
+        return False
+    try:
+        os.link(blob_path, target)
+    except FileExistsError:
+        return False
+    except OSError:
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        shutil.copy2(blob_path, tmp_path)
+        os.replace(tmp_path, target)
+    return True
+
+def _materialize(section, blobs_dir, dest_dir):
+    """Writes a section into dest_dir, keeping what is already there. Returns the files written."""
+    for rel_dir in section["dirs"]:
+        target = extract._safe_target(dest_dir, rel_dir)
+        if target:
+            os.makedirs(target, exist_ok=True)
+    count = 0
+    for rel_path, blob in section["files"].items():
+        target = extract._safe_target(dest_dir, rel_path)
+        if target is None:
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        count += _place(os.path.join(blobs_dir, blob), target)
+    if os.name != "nt":
+        for rel_path, link in section["links"].items():
+            target = extract._safe_target(dest_dir, rel_path)
+            if target is None or os.path.lexists(target) or extract._link_escapes(dest_dir, target, link):
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.symlink(link, target)
+    return count
+
+def _import_tool(section, blobs_dir, entry_dir):
+    """Publishes a tool entry atomically, under the store entry lock. False when already installed."""
+    with locks.file_lock(get_entry_lock_path(entry_dir)):
+        if os.path.exists(entry_dir):
+            return False
+        staging_dir = tempfile.mkdtemp(prefix=f".{os.path.basename(entry_dir)}-import-",
+                                       dir=os.path.dirname(entry_dir))
+        try:
+            _materialize(section, blobs_dir, staging_dir)
+            touch_entry(staging_dir)
+            os.replace(staging_dir, entry_dir)
+        finally:
+            if os.path.exists(staging_dir):
+                shutil.rmtree(staging_dir, ignore_errors=True)
+    return True
+
+def _import_store_entries(section, blobs_dir, store_root):
+    """
+    Imports a content-addressed store (npm) one top-level entry at a time: each is
+    staged, then published with os.replace, so a reader never sees half an entry.
+    Entries already present are kept. Returns the files written.
+    """
+    entries = {}
+    for field in ("files", "links"):
+        for rel_path, value in section[field].items():
+            top, _, rest = rel_path.partition("/")
+            if rest:
+                entries.setdefault(top, {"files": {}, "links": {}, "dirs": []})[field][rest] = value
+    for rel_dir in section["dirs"]:
+        top, _, rest = rel_dir.partition("/")
+        if rest and top in entries:
+            entries[top]["dirs"].append(rest)
+
+    count = 0
+    for top, entry in entries.items():
+        entry_dir = extract._safe_target(store_root, top)
+        if entry_dir is None or top.startswith(".") or os.path.isdir(entry_dir):
+            continue  # Staging leftovers of the exporting machine, or already in the store
+        staging_dir = tempfile.mkdtemp(prefix=".staging-", dir=store_root)
+        try:
+            written = _materialize(entry, blobs_dir, staging_dir)
+            try:
+                os.replace(staging_dir, entry_dir)
+                count += written
+            except OSError:
+                # Another process published the same entry meanwhile
+                if not os.path.isdir(entry_dir):
+                    raise
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+    return count
+
+def import_bundle(config, bundle_path, workers=None):
+    """
+    Unpacks a bundle made by export_bundle and registers its content in this
+    machine's store and caches. Returns [(kind, name, status)].
+    """
+    with zipfile.ZipFile(bundle_path) as zf:
+        manifest = json.loads(zf.read(MANIFEST_NAME))
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported bundle version: {manifest.get('version')}")
+
+    store_root = get_store_root(config)
+    os.makedirs(store_root, exist_ok=True)
+    # Next to the store, so blobs are hardlinked instead of copied
+    staging = tempfile.mkdtemp(prefix=".bundle-", dir=store_root)
+    results = []
+    try:
+        with Progress(console=console, transient=True) as progress:
+            progress.add_task("[cyan]Extracting bundle...", total=None)
+            with trace.span("extract", bundle=os.path.basename(bundle_path)):
+                extract.extract_archive(bundle_path, staging, kind="zip", workers=workers)
+        blobs_dir = os.path.join(staging, BLOBS_DIR)
+
+        # Tools first: uv and npm must be in place to know where their caches go
+        sections = sorted(manifest["sections"], key=lambda s: s["kind"] != "tool")
+        cache_dirs = {}
+        for section in sections:
+            kind, name = section["kind"], section["name"]
+            dest_dir, reason = _destination(section, config, cache_dirs)
+            if dest_dir is None:
+                results.append((kind, name, f"skipped ({reason})"))
+                continue
+            with trace.span("bundle_import", section=f"{kind}:{name}"):
+                if kind == "tool":
+                    status = "installed" if _import_tool(section, blobs_dir, dest_dir) else "already installed"
+                elif kind == "npm":
+                    os.makedirs(dest_dir, exist_ok=True)
+                    status = f"{_import_store_entries(section, blobs_dir, dest_dir)} new file(s)"
+                else:
+                    os.makedirs(dest_dir, exist_ok=True)
+                    status = f"{_materialize(section, blobs_dir, dest_dir)} new file(s)"
+            results.append((kind, name, status))
+        open(os.path.join(config['settings']['base_dir'], OFFLINE_MARKER), "w").close()
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return results
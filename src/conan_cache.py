@@ -0,0 +1,164 @@
+import os
+import json
+import hashlib
+import tempfile
+from rich.console import Console
+from src import trace
+
+console = Console()
+
+# Optional binary cache shared by every project of the machine (or team, when the
+# folder is a network share). Enabled by 'conan_shared_cache' in config.yaml
+# settings or the PCK_CONAN_SHARED_CACHE environment variable. Layout:
+#   <shared>/downloads/             Conan download cache (core.download:download_cache)
+#   <shared>/<key>/<package>.tgz    'conan cache save' archives, one per binary
+# <key> hashes the Conan profile and the zig toolchain, so binaries built with a
+# different compiler setup are never mixed.
+# Without either, <base_dir>/conan_cache is used when it exists (created by 'pck bundle import').
+# Before an install, only the binaries of the project's resolved graph are restored.
+SHARED_CACHE_ENV = "PCK_CONAN_SHARED_CACHE"
+DEFAULT_SHARED_DIR = "conan_cache"
+RESTORED_FILE = ".pck_restored.json"
+
+def get_shared_root(config: dict):
+    path = os.environ.get(SHARED_CACHE_ENV) or config['settings'].get('conan_shared_cache')
+    if not path:
+        default = os.path.join(config['settings']['base_dir'], DEFAULT_SHARED_DIR)
+        return default if os.path.isdir(default) else None
+    return os.path.abspath(os.path.expanduser(path))
+
+def cache_key(profile_path, zig_identity):
+    hasher = hashlib.sha256()
+    with open(profile_path, "rb") as f:
+        hasher.update(f.read())
+    hasher.update(zig_identity.encode("utf-8"))
+    return hasher.hexdigest()[:16]
+
+def configure(conan_home, shared_root):
+    """Points the project Conan home at the shared download cache (global.conf)."""
+    downloads = os.path.join(shared_root, "downloads")
+    os.makedirs(downloads, exist_ok=True)
+    conf_path = os.path.join(conan_home, "global.conf")
+    line = f"core.download:download_cache={downloads}"
+
+    lines = []
+    if os.path.exists(conf_path):
+        with open(conf_path, "r", encoding="utf-8") as f:
+            lines = [l.rstrip("\n") for l in f if not l.startswith("core.download:download_cache")]
+    lines.append(line)
+    os.makedirs(conan_home, exist_ok=True)
+    with open(conf_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+def _archive_name(ref, package_id):
+    return hashlib.sha256(f"{ref}:{package_id}".encode("utf-8")).hexdigest()[:24] + ".tgz"
+
+def _load_restored(conan_home):
+    try:
+        with open(os.path.join(conan_home, RESTORED_FILE), "r", encoding="utf-8") as f:
+            return set(json.load(f))
+    except (OSError, ValueError):
+        return set()
+
+def _save_restored(conan_home, names):
+    with open(os.path.join(conan_home, RESTORED_FILE), "w", encoding="utf-8") as f:
+        json.dump(sorted(names), f)
+
+def _missing_packages(conan_path, env, graph_args):
+    """
+    [(ref with revision, package_id)] of the binaries the project graph needs and
+    the project cache doesn't have, or None when the graph can't be resolved.
+    """
+    ret = trace.run([conan_path, "graph", "info", "."] + graph_args + ["--format=json"],
+                    env=env, capture_output=True, text=True)
+    if ret.returncode != 0:
+        return None
+    try:
+        nodes = json.loads(ret.stdout)["graph"]["nodes"]
+    except (ValueError, KeyError, TypeError):
+        return None
+
+    packages = []
+    for node in nodes.values():
+        if node.get("recipe") == "Consumer" or not node.get("package_id"):
+            continue
+        if node.get("binary") in ("Cache", "Skip"):
+            continue
+        packages.append((node["ref"], node["package_id"]))
+    return packages
+
+def restore(conan_path, env, cache_dir, graph_args):
+    """
+    Imports the shared binaries of the project graph that this project cache lacks.
+    Returns the count.
+    """
+    if not os.path.isdir(cache_dir):
+        return 0
+    conan_home = env["CONAN_HOME"]
+    restored = _load_restored(conan_home)
+    needed = _missing_packages(conan_path, env, graph_args)
+    if needed is None:
+        # No resolvable graph (offline, recipes never fetched): the shared cache is the only
+        # source of recipes, so everything not seen yet is imported
+        names = sorted(name for name in os.listdir(cache_dir) if name.endswith(".tgz"))
+    else:
+        names = [_archive_name(ref, package_id) for ref, package_id in needed]
+    count = 0
+    for name in names:
+        if name in restored or not os.path.exists(os.path.join(cache_dir, name)):
+            continue
+        ret = trace.run([conan_path, "cache", "restore", os.path.join(cache_dir, name)],
+                        env=env, capture_output=True, text=True)
+        if ret.returncode == 0:
+            restored.add(name)
+            count += 1
+    _save_restored(conan_home, restored)
+    return count
+
+def _list_local_packages(conan_path, env):
+    """Returns [(ref with revision, package_id)] of every binary in the project cache."""
+    ret = trace.run([conan_path, "list", "*:*", "--format=json"], env=env, capture_output=True, text=True)
+    if ret.returncode != 0:
+        return []
+    try:
+        data = json.loads(ret.stdout)
+    except ValueError:
+        return []
+
+    packages = []
+    for ref, ref_info in data.get("Local Cache", {}).items():
+        for rrev, rev_info in (ref_info or {}).get("revisions", {}).items():
+            for package_id in (rev_info or {}).get("packages", {}):
+                packages.append((f"{ref}#{rrev}", package_id))
+    return packages
+
+def publish(conan_path, env, cache_dir):
+    """Saves every local binary missing from the shared cache. Returns the count."""
+    os.makedirs(cache_dir, exist_ok=True)
+    conan_home = env["CONAN_HOME"]
+    restored = _load_restored(conan_home)
+    count = 0
+    for ref, package_id in _list_local_packages(conan_path, env):
+        name = _archive_name(ref, package_id)
+        final_path = os.path.join(cache_dir, name)
+        if os.path.exists(final_path):
+            restored.add(name)
+            continue
+
+        # Written under a private name, then renamed: readers never see partial archives
+        fd, tmp_path = tempfile.mkstemp(prefix=".saving-", suffix=".tgz", dir=cache_dir)
+        os.close(fd)
+        ret = trace.run([conan_path, "cache", "save", f"{ref}:{package_id}", f"--file={tmp_path}"],
+                        env=env, capture_output=True, text=True)
+        try:
+            if ret.returncode == 0:
+                os.replace(tmp_path, final_path)
+                restored.add(name)
+                count += 1
+        except OSError:
+            pass  # Already published by a concurrent job
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    _save_restored(conan_home, restored)
+    return count
@@ -0,0 +1,122 @@
+import os
+import re
+import time
+import itertools
+from collections import deque
+from rich.table import Table
+
+# Conan output handling for 'pck install':
+# - only the last lines stay in memory (ring buffer), the full log is streamed to disk;
+# - every "<ref>: <message>" line feeds a per-package phase timeline.
+LOG_DIR = os.path.join(".pck_cache", "logs")
+TAIL_LINES = 20
+KEEP_LOGS = 10
+
+PHASES = ("download", "build", "package", "deploy")
+
+_log_counter = itertools.count()
+
+_ref_regex = re.compile(r'^([\w.+-]+/[\w.+-]+(?:@[\w.+-]+/[\w.+-]+)?)(?:#\w+)?(?::\w+)?: (.*)$')
+
+# First matching prefix wins
+_PHASE_MARKERS = (
+    ("download", ("Retrieving package", "Retrieving from", "Downloading", "Downloaded", "Decompressing")),
+    ("build", ("Calling source()", "Building your package", "Building from source", "Calling generate()",
+               "Calling build()", "Calling configure()", "Copying sources")),
+    ("package", ("Calling package()", "package():", "Generating the package", "Package folder")),
+)
+
+def classify(message):
+    for phase, markers in _PHASE_MARKERS:
+        if any(message.startswith(m) for m in markers):
+            return phase
+    return None
+
+class ConanOutput:
+    """Collects Conan output: bounded tail, on-disk log and per-package phase timeline."""
+
+    def __init__(self, project_dir, tail_lines=TAIL_LINES):
+        self.tail = deque(maxlen=tail_lines)
+        log_dir = os.path.join(project_dir, LOG_DIR)
+        os.makedirs(log_dir, exist_ok=True)
+        self._prune(log_dir)
+        # Pid and counter: installs started in the same second (CI, shell) get their own log
+        name = time.strftime("conan-install-%Y%m%d-%H%M%S") + f"-{os.getpid()}-{next(_log_counter)}.log"
+        self.log_path = os.path.join(log_dir, name)
+        self._log = open(self.log_path, "x", encoding="utf-8")
+        self.start = time.monotonic()
+        # ref -> {phase: seconds}, plus the phase currently running for each ref
+        self.durations = {}
+        self._current = {}
+        self._last_seen = {}
+        self._deploy_start = None
+        self.last_event = None  # (ref, phase) of the last phase change, for the spinner
+
+    @staticmethod
+    def _prune(log_dir):
+        logs = sorted(n for n in os.listdir(log_dir) if n.startswith("conan-install-"))
+        for name in logs[:max(0, len(logs) - KEEP_LOGS + 1)]:
+            try: os.remove(os.path.join(log_dir, name))
+            except OSError: pass
+
+    def feed(self, line, now=None):
+        now = time.monotonic() if now is None else now
+        self.tail.append(line)
+        self._log.write(line + "\n")
+
+        if "Finalizing install" in line or line.startswith("Full deploy"):
+            self._close_all(now)
+            if self._deploy_start is None:
+                self._deploy_start = now
+                self.last_event = ("(all)", "deploy")
+            return
+
+        match = _ref_regex.match(line)
+        if not match:
+            return
+        ref, message = match.groups()
+        phase = classify(message)
+        current = self._current.get(ref)
+
+        if phase and (current is None or current[0] != phase):
+            self._close(ref, now)
+            self._current[ref] = (phase, now)
+            self.last_event = (ref, phase)
+        # A phase lasts until the next phase of the same package, or its last output line
+        self._last_seen[ref] = now
+
+    def _close(self, ref, now):
+        current = self._current.pop(ref, None)
+        if current:
+            phase, started = current
+            per_ref = self.durations.setdefault(ref, {})
+            per_ref[phase] = per_ref.get(phase, 0.0) + (now - started)
+
+    def _close_all(self, now):
+        for ref in list(self._current):
+            self._close(ref, self._last_seen.get(ref, now))
+
+    def finish(self, now=None):
+        now = time.monotonic() if now is None else now
+        self._close_all(now)
+        if self._deploy_start is not None:
+            self.durations.setdefault("(all)", {})["deploy"] = now - self._deploy_start
+        self.close()
+        return now - self.start
+
+    def close(self):
+        """Closes the on-disk log (idempotent)."""
+        self._log.close()
+
+    def summary_table(self, total_seconds):
+        table = Table(title=f"Conan install timeline ({total_seconds:.1f}s)")
+        table.add_column("Package")
+        for phase in PHASES:
+            table.add_column(phase.capitalize(), justify="right")
+        table.add_column("Total", justify="right")
+
+        rows = [(ref, phases, sum(phases.values())) for ref, phases in self.durations.items() if phases]
+        for ref, phases, total in sorted(rows, key=lambda r: r[2], reverse=True):
+            cells = [f"{phases[p]:.1f}s" if p in phases else "" for p in PHASES]
+            table.add_row(ref, *cells, f"{total:.1f}s")
+        return table if rows else None
@@ -4,16 +4,28 @@ import sys
 import glob
 import re
 import shlex
+import json
+import platform
+from contextlib import contextmanager
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
-from src.download import ensure_tool_installed
+from src.download import ensure_tool_installed, ensure_tools_installed
+from src import build_cache
+from src import conan_cache
+from src import conan_log
+from src import locks
+from src import pch
+from src import profiles
+from src import trace
 
 console = Console()
 
 LOCAL_CONAN_DIR = ".conan_store"
 DEPS_DIR = "pck_modules"
 ZIG_CACHE_DIR = ".zig-cache"
+ZIG_SEED_MARKER = ".pck_seeded"  # + "-<target>", written once libc/runtime are built
 WRAPPERS_DIR = "wrappers"
+BUILD_DIR = "build"
 
 def to_cmake_path(path):
     """Converts Windows backslashes to forward slashes for CMake/Conan."""
@@ -28,12 +40,17 @@ def get_conan_env(base_env=None):
 
 # --- .PC FILE PARSER (FIXED) ---
 def parse_pc_files(search_dir):
+    with trace.span("parse_pc_files", dir=search_dir):
+        return _parse_pc_files(search_dir)
+
+def _parse_pc_files(search_dir):
     pc_files = glob.glob(os.path.join(search_dir, "*.pc"))
     if not pc_files:
         return [], []
 
-    compiler_flags = [] 
-    linker_flags = []   
+    # dicts keep insertion order and give O(1) de-duplication
+    compiler_flags = {}
+    linker_flags = {}
 
     var_regex = re.compile(r'^([a-zA-Z0-9_]+)=(.*)$')
     sub_regex = re.compile(r'\$\{([a-zA-Z0-9_]+)\}')
@@ -42,6 +59,11 @@ def parse_pc_files(search_dir):
         variables = {}
         variables['pcfiledir'] = to_cmake_path(os.path.dirname(os.path.abspath(pc_file)))
 
+        # Variables are stored fully resolved, so a single substitution pass is enough.
+        # Unknown variables are left untouched.
+        def substitute(text):
+            return sub_regex.sub(lambda m: variables.get(m.group(1), m.group(0)), text)
+
         with open(pc_file, 'r', encoding='utf-8', errors='ignore') as f:
             lines = f.readlines()
 
@@ -53,44 +75,136 @@ def parse_pc_files(search_dir):
                 key, raw_val = match.groups()
                 # IMPORTANT: Clean quotes here
                 raw_val = raw_val.strip().strip('"').strip("'")
-                
-                # Recursive resolution
-                while True:
-                    sub_match = sub_regex.search(raw_val)
-                    if not sub_match: break
-                    var_name = sub_match.group(1)
-                    if var_name in variables:
-                        raw_val = raw_val.replace(f"${{{var_name}}}", variables[var_name])
-                    else: break
-                variables[key] = to_cmake_path(raw_val)
+                variables[key] = to_cmake_path(substitute(raw_val))
 
         # 2nd pass: Extract Cflags and Libs
         for line in lines:
-            # Replace variables in the line
-            while True:
-                sub_match = sub_regex.search(line)
-                if not sub_match: break
-                var_name = sub_match.group(1)
-                if var_name in variables:
-                    line = line.replace(f"${{{var_name}}}", variables[var_name])
-                else: break 
-            
             if line.startswith("Cflags:"):
-                content = line[7:].strip()
                 # shlex.split handles spaces in paths and removes quotes
-                args = shlex.split(content)
-                for arg in args:
-                    if arg not in compiler_flags: compiler_flags.append(arg)
-            
+                for arg in shlex.split(substitute(line[7:].strip())):
+                    compiler_flags.setdefault(arg, None)
             elif line.startswith("Libs:"):
-                content = line[5:].strip()
-                args = shlex.split(content)
-                for arg in args:
-                    if arg not in linker_flags: linker_flags.append(arg)
+                for arg in shlex.split(substitute(line[5:].strip())):
+                    linker_flags.setdefault(arg, None)
+
+    return list(compiler_flags), list(linker_flags)
+
+# --- DEPENDENCY INDEX ---
+# Resolved flags and runtime folders of pck_modules, cached in .pck_cache/deps_index.json
+# next to it. It is invalidated when pck_modules itself or any indexed .pc file changes.
+DEPS_INDEX_FILE = "deps_index.json"
+DEPS_INDEX_VERSION = 1
+
+LIB_PATTERNS = ("lib{}.a", "lib{}.dll.a", "lib{}.so", "lib{}.dylib", "{}.lib")
+
+def linked_libraries(libs_flags):
+    """
+    Library files a link with libs_flags reads (-l names found in the -L folders,
+    plus libraries given by path): a reinstalled dependency changes their identity.
+    """
+    lib_dirs = [flag[2:] for flag in libs_flags if flag.startswith("-L")]
+    files = []
+    for flag in libs_flags:
+        if flag.startswith("-l"):
+            for lib_dir in lib_dirs:
+                for pattern in LIB_PATTERNS:
+                    path = os.path.join(lib_dir, pattern.format(flag[2:]))
+                    if os.path.isfile(path):
+                        files.append(path)
+        elif not flag.startswith("-") and os.path.isfile(flag):
+            files.append(flag)
+    return files
+
+def _get_deps_index_path(deps_path):
+    parent, name = os.path.split(os.path.abspath(deps_path))
+    if os.path.basename(parent) == DEPS_DIR:
+        # pck_modules/<target>: one index per target, in the project's cache
+        return os.path.join(os.path.dirname(parent), build_cache.BUILD_CACHE_DIR, f"deps_index-{name}.json")
+    return os.path.join(parent, build_cache.BUILD_CACHE_DIR, DEPS_INDEX_FILE)
+
+def _stat_key(path):
+    try:
+        st = os.stat(path)
+        return [st.st_mtime_ns, st.st_size]
+    except OSError:
+        return None
+
+def build_deps_index(deps_path):
+    """Parses pck_modules from scratch and writes the index. Returns the index dict."""
+    cflags, libs = parse_pc_files(deps_path)
 
-    return compiler_flags, linker_flags
+    # Folders prepended to PATH at runtime (DLLs of the dependencies)
+    bin_dirs = []
+    if os.path.exists(deps_path):
+        for root, dirs, files in os.walk(deps_path):
+            if "bin" in dirs:
+                bin_dirs.insert(0, os.path.join(root, "bin"))
+
+    index = {
+        "version": DEPS_INDEX_VERSION,
+        "dir": _stat_key(deps_path),
+        "pc_files": {p: _stat_key(p) for p in glob.glob(os.path.join(deps_path, "*.pc"))},
+        "cflags": cflags,
+        "libs": libs,
+        "bin_dirs": bin_dirs,
+    }
+
+    if os.path.isdir(deps_path):
+        index_path = _get_deps_index_path(deps_path)
+        tmp_path = f"{index_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(index_path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(index, f)
+            os.replace(tmp_path, index_path)
+        except OSError:
+            pass
+    return index
+
+def load_deps_index(deps_path):
+    """
+    Returns (cflags, libs, bin_dirs) for pck_modules.
+    Reads the persisted index when it is still valid, rebuilds it otherwise.
+    """
+    with trace.span("load_deps_index"):
+        return _load_deps_index(deps_path)
+
+def _load_deps_index(deps_path):
+    index = None
+    try:
+        with open(_get_deps_index_path(deps_path), "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    valid = (
+        index is not None
+        and index.get("version") == DEPS_INDEX_VERSION
+        and index.get("dir") == _stat_key(deps_path)
+        and all(_stat_key(p) == key for p, key in index.get("pc_files", {}).items())
+    )
+    if not valid:
+        index = build_deps_index(deps_path)
+    return index["cflags"], index["libs"], index["bin_dirs"]
 
 def create_fake_gcc_wrappers(target_dir, zig_path):
+    with trace.span("create_fake_gcc_wrappers"), locks.file_lock(locks.get_lock_path(target_dir, "wrappers")):
+        return _write_gcc_wrappers(target_dir, zig_path)
+
+def _write_if_changed(path, content, encoding=None):
+    """Atomic write (tmp + replace), skipped when the file already has this content."""
+    try:
+        with open(path, "r", encoding=encoding) as f:
+            if f.read() == content:
+                return
+    except (OSError, ValueError):
+        pass
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding=encoding) as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+def _write_gcc_wrappers(target_dir, zig_path):
     wrappers_path = os.path.join(target_dir, WRAPPERS_DIR)
     if not os.path.exists(wrappers_path):
         os.makedirs(wrappers_path)
@@ -98,14 +212,10 @@ def create_fake_gcc_wrappers(target_dir, zig_path):
     zig_safe = f'"{zig_path}"'
     python_exe = sys.executable
     
-    with open(os.path.join(wrappers_path, "gcc.cmd"), "w") as f:
-        f.write(f'@echo off\n{zig_safe} cc -target x86_64-windows-gnu %*\n')
-    with open(os.path.join(wrappers_path, "g++.cmd"), "w") as f:
-        f.write(f'@echo off\n{zig_safe} c++ -target x86_64-windows-gnu %*\n')
-    with open(os.path.join(wrappers_path, "ar.cmd"), "w") as f:
-        f.write(f'@echo off\n{zig_safe} ar %*\n')
-    with open(os.path.join(wrappers_path, "ranlib.cmd"), "w") as f:
-        f.write(f'@echo off\n{zig_safe} ranlib %*\n')
+    _write_if_changed(os.path.join(wrappers_path, "gcc.cmd"), f'@echo off\n{zig_safe} cc -target {CONAN_TARGET} %*\n')
+    _write_if_changed(os.path.join(wrappers_path, "g++.cmd"), f'@echo off\n{zig_safe} c++ -target {CONAN_TARGET} %*\n')
+    _write_if_changed(os.path.join(wrappers_path, "ar.cmd"), f'@echo off\n{zig_safe} ar %*\n')
+    _write_if_changed(os.path.join(wrappers_path, "ranlib.cmd"), f'@echo off\n{zig_safe} ranlib %*\n')
 
     # SHIM CORRIGÉ POUR LES GUILLEMETS
     shim_code = r'''# -*- coding: utf-8 -*-
@@ -145,11 +255,8 @@ if infile: new_args.append(infile)
 sys.exit(subprocess.run(new_args).returncode)
 '''
     shim_path = os.path.join(wrappers_path, "windres_shim.py")
-    with open(shim_path, "w", encoding="utf-8") as f:
-        f.write(shim_code)
-
-    with open(os.path.join(wrappers_path, "windres.cmd"), "w") as f:
-        f.write(f'@echo off\n"{python_exe}" "{shim_path}" {zig_safe} %*\n')
+    _write_if_changed(shim_path, shim_code, encoding="utf-8")
+    _write_if_changed(os.path.join(wrappers_path, "windres.cmd"), f'@echo off\n"{python_exe}" "{shim_path}" {zig_safe} %*\n')
 
     return wrappers_path
 
@@ -178,21 +285,79 @@ def create_project(config, target_dir, lang="c"):
     gitignore_path = os.path.join(target_dir, ".gitignore")
     if not os.path.exists(gitignore_path):
         with open(gitignore_path, "w") as f:
-            f.write(f"{LOCAL_CONAN_DIR}/\n{DEPS_DIR}/\n{ZIG_CACHE_DIR}/\n{WRAPPERS_DIR}/\n*.exe\n*.obj\n*.pdb\n")
+            f.write(f"{LOCAL_CONAN_DIR}/\n{DEPS_DIR}/\n{ZIG_CACHE_DIR}/\n{WRAPPERS_DIR}/\n{build_cache.BUILD_CACHE_DIR}/\n{BUILD_DIR}/\n*.exe\n*.obj\n*.pdb\n")
+
+# --- CONANFILE ---
+# pck maintains a conanfile.txt in the project: every installed package is
+# accumulated in [requires] so Conan solves the whole graph in a single run.
+CONANFILE = "conanfile.txt"
+
+def read_conanfile(path=CONANFILE):
+    """Returns the conanfile as an ordered {section: [lines]} dict."""
+    sections = {}
+    if not os.path.exists(path):
+        return sections
+    current = None
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("[") and line.endswith("]"):
+                current = line[1:-1]
+                sections.setdefault(current, [])
+            elif current:
+                sections[current].append(line)
+    return sections
+
+def write_conanfile(sections, path=CONANFILE):
+    content = "\n".join(f"[{name}]\n" + "".join(f"{line}\n" for line in lines) for name, lines in sections.items())
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+def add_requirements(sections, package_names):
+    """Adds references to [requires]; a new version of an existing package replaces the old one."""
+    requires = sections.setdefault("requires", [])
+    for ref in package_names:
+        name = ref.split("/")[0]
+        requires[:] = [r for r in requires if r.split("/")[0] != name]
+        requires.append(ref)
+    return sections
 
 def install_package(config, package_name):
-    conan_path = ensure_tool_installed("conan", config)
-    ensure_tool_installed("cmake", config)
-    ensure_tool_installed("ninja", config)
-    zig_path = ensure_tool_installed("zig", config)
+    return install_packages(config, [package_name])
+
+def install_packages(config, package_names):
+    """
+    Adds package_names to the project conanfile.txt and installs the whole
+    dependency graph with one Conan run (only missing binaries are built).
+    An empty list re-installs the current conanfile.
+    Runs under the project's conan lock: .conan_store, conanfile.txt and
+    pck_modules are only ever written by one pck process at a time.
+    Returns True when the install succeeded.
+    """
+    on_wait = lambda: console.print("[dim]⏳ Waiting for another pck process installing packages in this project...[/dim]")
+    with locks.file_lock(locks.get_lock_path(os.getcwd(), "conan"), on_wait=on_wait):
+        return _install_packages(config, package_names)
+
+def _install_packages(config, package_names):
+    # Provision the whole toolchain in one go (parallel downloads)
+    tools = ensure_tools_installed(["conan", "cmake", "ninja", "zig"], config)
+    missing = [name for name, path in tools.items() if not path]
+    if missing:
+        console.print(f"[bold red]❌ Missing tools: {', '.join(missing)}[/bold red]")
+        return False
+
+    conan_path = tools["conan"]
+    zig_path = tools["zig"]
     
     env, local_home = get_conan_env()
     cwd = os.getcwd()
     wrappers_path = create_fake_gcc_wrappers(cwd, zig_path)
 
     # PATH Config
-    cmake_bin = os.path.dirname(ensure_tool_installed("cmake", config))
-    ninja_bin = os.path.dirname(ensure_tool_installed("ninja", config))
+    cmake_bin = os.path.dirname(tools["cmake"])
+    ninja_bin = os.path.dirname(tools["ninja"])
     env["PATH"] = f"{wrappers_path}{os.pathsep}{cmake_bin}{os.pathsep}{ninja_bin}{os.pathsep}{env['PATH']}"
     
     # --- FIX PATH SEPARATORS ---
@@ -209,137 +374,367 @@ def install_package(config, package_name):
     env["CXXFLAGS"] = permissive_flags
     
     ensure_conan_profile(conan_path, env)
-    
-    if os.path.exists("conanfile.txt"):
-        try: os.remove("conanfile.txt")
-        except: pass
+
+    # --- SHARED BINARY CACHE (optional) ---
+    shared_root = conan_cache.get_shared_root(config)
+    shared_dir = None
+    if shared_root:
+        profile_path = os.path.join(env["CONAN_HOME"], "profiles", "default")
+        shared_dir = os.path.join(shared_root, conan_cache.cache_key(profile_path, config['tools']['zig']['url']))
+        conan_cache.configure(env["CONAN_HOME"], shared_root)
+
+    previous_conanfile = None
+    if os.path.exists(CONANFILE):
+        with open(CONANFILE, "r", encoding="utf-8") as f:
+            previous_conanfile = f.read()
+    sections = add_requirements(read_conanfile(), package_names)
+    if not sections.get("requires"):
+        console.print("[red]No package to install (conanfile.txt has no [requires]).[/red]")
+        return False
+    write_conanfile(sections)
+    label = ", ".join(package_names) if package_names else CONANFILE
 
     ar_cmd = to_cmake_path(os.path.join(wrappers_path, "ar.cmd"))
     ranlib_cmd = to_cmake_path(os.path.join(wrappers_path, "ranlib.cmd"))
     extra_vars = '{"CMAKE_AR": "' + ar_cmd + '", "CMAKE_RANLIB": "' + ranlib_cmd + '"}'
-    
+    graph_args = [
+        "--build=missing",
+        "-c", "tools.cmake.cmaketoolchain:generator=Ninja",
+        "-c", f"tools.cmake.cmaketoolchain:extra_variables={extra_vars}"
+    ]
+
+    if shared_dir:
+        # Only the binaries of this project's graph, not everything the team ever published
+        restored = conan_cache.restore(conan_path, env, shared_dir, graph_args)
+        if restored:
+            console.print(f"[dim]♻️  {restored} prebuilt package(s) restored from the shared cache[/dim]")
+
     cmd = [
-        conan_path, "install", 
-        "--requires", package_name, 
-        "--build=missing", 
+        conan_path, "install", ".",
         "--deployer=full_deploy", 
         "-g", "PkgConfigDeps", 
         f"--output-folder={DEPS_DIR}",
-        "-c", "tools.cmake.cmaketoolchain:generator=Ninja",
-        "-c", f"tools.cmake.cmaketoolchain:extra_variables={extra_vars}"
-    ]
+    ] + graph_args
     
     # --- DYNAMIC DISPLAY ---
     console.print(f"[bold cyan]📦 PCK Package Manager[/bold cyan]")
     install_success = False
-    error_log = []
-
-    with Progress(
-        SpinnerColumn("dots", style="bold magenta"),
-        TextColumn("{task.description}"),
-        transient=False 
-    ) as progress:
-        task_id = progress.add_task(f"Initializing Conan for {package_name}...", total=None)
+    output = conan_log.ConanOutput(cwd)
+
+    try:
+        with Progress(
+            SpinnerColumn("dots", style="bold magenta"),
+            TextColumn("{task.description}"),
+            transient=False 
+        ) as progress:
+            task_id = progress.add_task(f"Initializing Conan for {label}...", total=None)
         
-        # Popen to capture output line by line
-        process = subprocess.Popen(
-            cmd, 
-            env=env, 
-            stdout=subprocess.PIPE, 
-            stderr=subprocess.STDOUT, 
-            text=True, 
-            encoding='utf-8', 
-            errors='replace'
-        )
-
-        while True:
-            line = process.stdout.readline()
-            if not line and process.poll() is not None:
-                break
+            # Popen to capture output line by line
+            with trace.span("conan install", cat="subprocess", cmd=cmd):
+                process = subprocess.Popen(
+                    cmd, 
+                    env=env, 
+                    stdout=subprocess.PIPE, 
+                    stderr=subprocess.STDOUT, 
+                    text=True, 
+                    encoding='utf-8', 
+                    errors='replace'
+                )
+
+                while True:
+                    line = process.stdout.readline()
+                    if not line and process.poll() is not None:
+                        break
             
-            if line:
-                clean_line = line.strip()
-                error_log.append(clean_line)
+                    if line:
+                        clean_line = line.strip()
+                        previous_event = output.last_event
+                        output.feed(clean_line)
                 
-                if "Downloading" in clean_line:
-                    progress.update(task_id, description=f"[blue]⬇️  Downloading dependencies...[/blue]")
-                elif "Building" in clean_line:
-                    # Try to extract package name
-                    try:
-                        pkg = clean_line.split("Building")[1].split()[0]
-                    except:
-                        pkg = "package"
-                    progress.update(task_id, description=f"[orange3]🔨 Building {pkg} (This may take a while)...[/orange3]")
-                elif "Installing" in clean_line:
-                    progress.update(task_id, description=f"[green]📂 Installing files...[/green]")
-                elif "ERROR" in clean_line:
-                    progress.update(task_id, description=f"[red]💥 Error detected![/red]")
-
-        install_success = (process.poll() == 0)
+                        if "ERROR" in clean_line:
+                            progress.update(task_id, description=f"[red]💥 Error detected![/red]")
+                        elif output.last_event != previous_event:
+                            pkg, phase = output.last_event
+                            if phase == "download":
+                                progress.update(task_id, description=f"[blue]⬇️  Downloading {pkg}...[/blue]")
+                            elif phase == "build":
+                                progress.update(task_id, description=f"[orange3]🔨 Building {pkg} (This may take a while)...[/orange3]")
+                            elif phase == "package":
+                                progress.update(task_id, description=f"[orange3]📦 Packaging {pkg}...[/orange3]")
+                            else:
+                                progress.update(task_id, description=f"[green]📂 Installing files...[/green]")
+
+                install_success = (process.poll() == 0)
+    finally:
+        # Also when the install is interrupted (Ctrl+C) or conan can't be started
+        output.close()
+
+    total_seconds = output.finish()
+    timeline = output.summary_table(total_seconds)
+    if timeline:
+        console.print(timeline)
 
     if install_success:
-        console.print(f"[bold green]✅ {package_name} successfully installed![/bold green]")
+        build_deps_index(os.path.join(cwd, DEPS_DIR))
+        if shared_dir:
+            published = conan_cache.publish(conan_path, env, shared_dir)
+            if published:
+                console.print(f"[dim]📤 {published} package(s) published to the shared cache[/dim]")
+        console.print(f"[bold green]✅ {label} successfully installed![/bold green]")
         console.print(f"[dim]   Files are in ./{DEPS_DIR}[/dim]")
     else:
+        # Don't keep requirements that could not be installed
+        if previous_conanfile is None:
+            os.remove(CONANFILE)
+        else:
+            with open(CONANFILE, "w", encoding="utf-8") as f:
+                f.write(previous_conanfile)
         console.print(f"[bold red]❌ Installation failed![/bold red]")
-        console.print("[dim]--- Error Log (Last 20 lines) ---[/dim]")
-        for l in error_log[-20:]:
+        console.print(f"[dim]--- Error Log (Last {len(output.tail)} lines, full log: {output.log_path}) ---[/dim]")
+        for l in output.tail:
             console.print(f"[red]{l}[/red]")
+    return install_success
 
-def run_script(config, script_path):
+# --- TARGETS ---
+# zig target triples (arch-os-abi). Builds are for the host unless targets are
+# given ('pck build --targets'); every target shares the project's .zig-cache.
+# 'pck install' resolves Conan packages with a MinGW profile: pck_modules holds
+# CONAN_TARGET dependencies, other targets read theirs from pck_modules/<target>.
+CONAN_TARGET = "x86_64-windows-gnu"
+NATIVE_CPU_FLAGS = ("-march=native", "-mcpu=native", "-mtune=native")
+
+_ZIG_ARCHS = {"amd64": "x86_64", "x86_64": "x86_64", "arm64": "aarch64", "aarch64": "aarch64",
+              "x86": "x86", "i386": "x86", "i686": "x86", "armv7l": "arm", "riscv64": "riscv64"}
+_host_target = None
+
+def host_target():
+    """Triple of the machine pck runs on, e.g. x86_64-linux-gnu or x86_64-windows-gnu."""
+    global _host_target
+    if _host_target is None:
+        machine = platform.machine().lower()
+        arch = _ZIG_ARCHS.get(machine, machine)
+        if sys.platform == "win32":
+            _host_target = f"{arch}-windows-gnu"
+        elif sys.platform == "darwin":
+            _host_target = f"{arch}-macos-none"
+        else:
+            try:
+                libc = "gnu" if (os.confstr("CS_GNU_LIBC_VERSION") or "").startswith("glibc") else "musl"
+            except (AttributeError, ValueError, OSError):
+                libc = "musl"
+            _host_target = f"{arch}-linux-{libc}"
+    return _host_target
+
+def exe_suffix(target=None):
+    return ".exe" if "-windows" in (target or host_target()) else ""
+
+def get_deps_dir(project_dir, target=None):
+    """Dependencies of a target: pck_modules/<target>, else pck_modules for CONAN_TARGET, else None."""
+    target = target or host_target()
+    target_dir = os.path.join(project_dir, DEPS_DIR, target)
+    if os.path.isdir(target_dir):
+        return target_dir
+    return os.path.join(project_dir, DEPS_DIR) if target == CONAN_TARGET else None
+
+_warned_targets = set()
+
+def load_target_deps(project_dir, target=None):
+    """(cflags, libs, bin_dirs) of a target's dependencies, empty when it has none."""
+    deps_dir = get_deps_dir(project_dir, target)
+    if deps_dir:
+        return load_deps_index(deps_dir)
+
+    # Installed Conan dependencies that don't apply: say so once, or the build fails on missing headers
+    target = target or host_target()
+    conan_deps = os.path.join(project_dir, DEPS_DIR)
+    if os.path.exists(_get_deps_index_path(conan_deps)) and (project_dir, target) not in _warned_targets:
+        _warned_targets.add((project_dir, target))
+        console.print(f"[yellow]⚠️  {DEPS_DIR} holds dependencies built for {CONAN_TARGET}, not {target}: "
+                      f"they are not used. Build with --targets {CONAN_TARGET}, or put {target} "
+                      f"dependencies in {DEPS_DIR}/{target}.[/yellow]")
+    return [], [], []
+
+def get_base_flags(is_cpp, profile=None, target=None):
+    """Optimization (from the build profile), language and target flags shared by every zig invocation."""
+    target = target or host_target()
+    target_flags = ["-target", target]
+    opt_flags = profile["cflags"] if profile else ["-O2"]
+    if target != host_target():
+        # The host CPU means nothing for another architecture
+        opt_flags = [f for f in opt_flags if f not in NATIVE_CPU_FLAGS]
+    misc_flags = ["-w"] + opt_flags if not is_cpp else ["-w"] + opt_flags + ["-std=c++17"]
+    return misc_flags + target_flags
+
+def get_link_flags(is_cpp, profile=None, target=None):
+    """
+    Flags of a link step. -flto is left out on purpose: lld already optimizes the
+    -flto objects together, and zig would otherwise also build its libc as
+    bitcode, which fails for windows-gnu.
+    """
+    flags = [f for f in get_base_flags(is_cpp, profile, target) if not f.startswith("-flto")]
+    return flags + (profile["ldflags"] if profile else [])
+
+def get_profile_dir(project_dir, profile, target=None):
+    """build/<profile> for the host, build/<profile>/<target> for explicit targets."""
+    profile_dir = os.path.join(project_dir, BUILD_DIR, profile["name"])
+    return os.path.join(profile_dir, target) if target else profile_dir
+
+def get_compile_env(project_dir):
+    env = os.environ.copy()
+    env["ZIG_GLOBAL_CACHE_DIR"] = os.path.join(project_dir, ZIG_CACHE_DIR)
+    env["ZIG_LOCAL_CACHE_DIR"] = os.path.join(project_dir, ZIG_CACHE_DIR)
+    return env
+
+@contextmanager
+def zig_cache_guard(project_dir, targets=(None,), on_wait=None):
+    """
+    Held around compiles. The first one of a project fills .zig-cache with the
+    target's libc and runtime, which takes a while: concurrent pck processes wait
+    for it instead of all building the same thing (see locks.first_use).
+    Yields seeded(target=None), to call after a successful compile for target.
+    """
+    markers = {target: os.path.join(project_dir, ZIG_CACHE_DIR, f"{ZIG_SEED_MARKER}-{target or host_target()}")
+               for target in targets}
+    with locks.first_use(list(markers.values()), locks.get_lock_path(project_dir, "zig-cache"), on_wait) as mark:
+        yield lambda target=None: mark(markers[target])
+
+def _output_name(script_path, cwd):
+    """script_path relative to cwd, or its file name when it lives outside (absolute, other drive)."""
+    try:
+        rel_path = os.path.relpath(os.path.abspath(script_path), cwd)
+    except ValueError:
+        return os.path.basename(script_path)
+    return os.path.basename(script_path) if rel_path.startswith(os.pardir) else rel_path
+
+def compile_script(config, script_path, profile=None):
+    """
+    Compiles a single C/C++ file with zig, into build/<profile>/.
+    profile is a resolved build profile (see src/profiles.py), the project's default when None.
+    Returns (exe_name, env) on success, (None, env) on failure.
+    The compile is skipped when the pck build cache says nothing changed.
+    """
+    # --- COMPILATION SPINNER ---
+    # Only shown once something is actually compiled (nothing on a build cache hit)
+    progress = Progress(
+        SpinnerColumn(),
+        TextColumn("[bold blue]Compiling {task.description}..."),
+        transient=True
+    )
+    tasks = []
+    def status(description):
+        if tasks:
+            progress.update(tasks[0], description=description)
+        else:
+            progress.start()
+            tasks.append(progress.add_task(description=description, total=None))
+
+    try:
+        exe_name, env, error, cached = build_script(config, script_path, profile, status)
+    finally:
+        if tasks:
+            progress.stop()
+
+    if cached:
+        console.print(f"[dim]⚡ {script_path} unchanged, reusing {exe_name}[/dim]")
+    if error is not None:
+        console.print("[bold red]💥 Compilation failed![/bold red]")
+        console.print(error)
+        return None, env
+    return exe_name, env
+
+def build_script(config, script_path, profile=None, status=None, target=None):
+    """
+    compile_script without any output, safe to call from several threads.
+    status(description) is called before each compiler run; target defaults to the host.
+    Returns (exe_name or None, env, compiler error output or None, True if the build cache hit).
+    """
     zig_path = ensure_tool_installed("zig", config)
     
-    is_cpp = script_path.lower().endswith(".cpp") or script_path.lower().endswith(".cc")
+    is_cpp = script_path.lower().endswith(build_cache.CPP_EXTENSIONS)
     compiler_mode = "c++" if is_cpp else "cc"
     
-    exe_name = os.path.splitext(script_path)[0] + ".exe"
     cwd = os.getcwd()
-    deps_path = os.path.join(cwd, DEPS_DIR)
+    profile = profile or profiles.resolve(cwd)
+    exe_name = os.path.join(os.path.relpath(get_profile_dir(cwd, profile, target), cwd),
+                            os.path.splitext(_output_name(script_path, cwd))[0] + exe_suffix(target))
+    os.makedirs(os.path.dirname(exe_name), exist_ok=True)
     
-    # Parse dependencies silently
-    cflags, libs_flags = parse_pc_files(deps_path)
+    # Resolved dependency flags (persisted index, see load_deps_index)
+    cflags, libs_flags, _ = load_target_deps(cwd, target)
     
-    target_flags = ["-target", "x86_64-windows-gnu"]
-    misc_flags = ["-w", "-O2"] if not is_cpp else ["-w", "-O2", "-std=c++17"]
+    # Compiled and linked in one step: link flags (one TU has nothing to LTO across anyway)
+    compile_flags = get_link_flags(is_cpp, profile, target) + cflags
+    include_dirs = build_cache.get_include_dirs(cflags)
+    env = get_compile_env(cwd)
 
-    cmd = [zig_path, compiler_mode, script_path] + misc_flags + target_flags + cflags + libs_flags + ["-o", exe_name]
-    
-    env = os.environ.copy()
-    env["ZIG_GLOBAL_CACHE_DIR"] = os.path.join(cwd, ZIG_CACHE_DIR)
-    env["ZIG_LOCAL_CACHE_DIR"] = os.path.join(cwd, ZIG_CACHE_DIR)
+    make_cmd = lambda pch_flags: [zig_path, compiler_mode, script_path] + pch_flags + compile_flags + libs_flags + ["-o", exe_name]
+    cmd = make_cmd([])
 
-    # --- COMPILATION SPINNER ---
-    compile_success = False
-    error_msg = ""
-    
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[bold blue]Compiling {task.description}..."),
-        transient=True
-    ) as progress:
-        progress.add_task(description=script_path, total=None)
-        
-        ret = subprocess.run(cmd, env=env, capture_output=True, text=True)
-        
+    # --- BUILD CACHE ---
+    # The PCH only speeds the compile up and the stamp already tracks the dependency
+    # headers, so it stays out of the key: a hit never has to scan the source for it
+    stamp_path = build_cache.get_stamp_path(cwd, exe_name)
+    key = build_cache.command_key(cmd, zig_path, linked_libraries(libs_flags))
+    with trace.span("build_cache_check", script=script_path):
+        up_to_date = build_cache.is_up_to_date(stamp_path, exe_name, key, script_path, include_dirs)
+    if up_to_date:
+        trace.count("build_cache_hit")
+        return exe_name, env, None, True
+    trace.count("build_cache_miss")
+
+    # Precompiled header of the dependency headers
+    pch_plan = pch.plan(cwd, script_path, [zig_path, compiler_mode], compile_flags, include_dirs, is_cpp)
+    if pch_plan:
+        cmd = make_cmd(pch.flags_for(pch_plan))
+
+    status = status or (lambda description: None)
+    on_wait = lambda: status(f"{script_path} (waiting for another pck process to fill {ZIG_CACHE_DIR})")
+    with trace.span("compile", script=script_path), zig_cache_guard(cwd, [target], on_wait) as seeded:
+        fresh_pch = False
+        if pch_plan and not os.path.exists(pch_plan["pch_path"]):
+            status(f"{script_path} (precompiling dependency headers)")
+            fresh_pch = pch.build(pch_plan, [zig_path, compiler_mode], compile_flags, env)
+            if not fresh_pch:
+                cmd, pch_plan = make_cmd([]), None
+
+        status(script_path)
+        ret = trace.run(cmd, env=env, capture_output=True, text=True)
+        if ret.returncode != 0 and pch_plan:
+            # The PCH may be stale (a header it pulls in changed) or unusable: retry without it
+            ret = trace.run(make_cmd([]), env=env, capture_output=True, text=True)
+            if ret.returncode == 0:
+                pch.reject(pch_plan, fresh_pch)
         if ret.returncode == 0:
-            compile_success = True
-        else:
-            error_msg = ret.stderr
+            seeded(target)
+    if ret.returncode != 0:
+        return None, env, ret.stderr, False
 
-    if compile_success:
-        console.print(f"[bold green]🚀 Executing {exe_name}...[/bold green]")
-        
-        new_path = env["PATH"]
-        if os.path.exists(deps_path):
-            for root, dirs, files in os.walk(deps_path):
-                if "bin" in dirs:
-                    new_path = os.path.join(root, "bin") + os.pathsep + new_path
-        env["PATH"] = new_path
-        
-        try:
-            subprocess.run([os.path.join(cwd, exe_name)], env=env)
-        except KeyboardInterrupt:
-            pass
-    else:
-        console.print("[bold red]💥 Compilation failed![/bold red]")
-        console.print(error_msg)
\ No newline at end of file
+    build_cache.write_stamp(stamp_path, key, script_path, include_dirs)
+    return exe_name, env, None, False
+
+def prepare_run(config, script_path, profile=None):
+    """
+    Builds script_path if needed. Returns (cmd, env) ready to launch, with the
+    dependency DLL folders on PATH, or (None, env) when compilation failed.
+    """
+    exe_name, env = compile_script(config, script_path, profile)
+    if not exe_name:
+        return None, env
+
+    cwd = os.getcwd()
+    _, _, bin_dirs = load_target_deps(cwd)
+    env["PATH"] = os.pathsep.join(bin_dirs + [env["PATH"]])
+    return [os.path.join(cwd, exe_name)], env
+
+def run_script(config, script_path, profile=None):
+    """Builds and runs script_path. Returns the program's exit code, None when it didn't build."""
+    cmd, env = prepare_run(config, script_path, profile)
+    if not cmd:
+        return None
+
+    console.print(f"[bold green]🚀 Executing {os.path.relpath(cmd[0])}...[/bold green]")
+    try:
+        with trace.span("execute"):
+            return trace.run(cmd, env=env).returncode
+    except KeyboardInterrupt:
+        return 130
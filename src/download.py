@@ -1,67 +1,231 @@
 import os
-import zipfile
-import requests
+import time
+import tempfile
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from rich.console import Console
 from rich.progress import Progress
+from src.store import DOWNLOADS_DIR, get_entry_dir, get_entry_lock_path, get_legacy_dir, get_store_root, touch_entry
+from src import trace
+from src import extract
+from src import fetch
+from src import locks
 
 console = Console()
 
-def ensure_tool_installed(tool_name: str, config: dict):
-    base_dir = config['settings']['base_dir']
+def _get_tool_paths(tool_name: str, config: dict):
+    """Returns (store entry dir, exe_full_path) for a tool declared in config.yaml."""
+    entry_dir = get_entry_dir(tool_name, config)
+    exe_full_path = os.path.join(entry_dir, config['tools'][tool_name]['exe_path'])
+    return entry_dir, exe_full_path
+
+def _get_part_path(entry_dir, config: dict):
+    downloads = os.path.join(get_store_root(config), DOWNLOADS_DIR)
+    os.makedirs(downloads, exist_ok=True)
+    return os.path.join(downloads, os.path.basename(entry_dir) + ".part")
+
+def _publish_dir(staging_dir, entry_dir):
+    """Atomically moves a fully extracted staging folder to its final location."""
+    if os.path.exists(entry_dir):
+        # Leftover from a broken install: move it aside first, rename cannot overwrite a folder
+        trash_dir = tempfile.mkdtemp(prefix=".trash-", dir=os.path.dirname(entry_dir))
+        os.replace(entry_dir, os.path.join(trash_dir, "old"))
+        shutil.rmtree(trash_dir, ignore_errors=True)
+    os.replace(staging_dir, entry_dir)
+
+def _install_tool(tool_name: str, config: dict, progress: Progress):
+    """
+    Installs a tool under its store entry lock. When another pck process is
+    already installing it, waits for that process and reuses its result.
+    """
+    entry_dir, exe_full_path = _get_tool_paths(tool_name, config)
+    on_wait = lambda: progress.console.print(f"[dim]⏳ Waiting for another pck process installing {tool_name}...[/dim]")
+    with trace.span("install_tool", tool=tool_name), locks.file_lock(get_entry_lock_path(entry_dir), on_wait=on_wait):
+        if os.path.exists(exe_full_path):
+            touch_entry(entry_dir)
+            return exe_full_path
+        if _adopt_legacy(tool_name, config, entry_dir, progress.console):
+            return exe_full_path
+        return _download_and_extract(tool_name, config, progress)
+
+def _legacy_matches_url(tool_conf: dict):
+    """
+    True when the old layout pins the version of the current URL: a folder of exe_path
+    below folder_name is named after the archive (e.g. cmake-3.31.1-windows-x86_64).
+    'uv/uv.exe' could hold any uv version, so it is never moved into a keyed entry.
+    """
+    archive = os.path.basename(tool_conf['url'].split("?", 1)[0])
+    folders = tool_conf['exe_path'].replace("\\", "/").split("/")[1:-1]
+    return any(folder and folder in archive for folder in folders)
+
+def _adopt_legacy(tool_name: str, config: dict, entry_dir, out):
+    """
+    Moves an install from before the store (<base_dir>/<folder_name>) into the
+    tool's entry instead of downloading it again. Returns True when it was moved.
+    """
     tool_conf = config['tools'][tool_name]
-    
-    tool_dir = os.path.join(base_dir, tool_conf['folder_name'])
-    
-    # Full path to the target executable
-    exe_full_path = os.path.join(base_dir, tool_conf['exe_path'])
+    legacy_dir = get_legacy_dir(tool_name, config)
+    if not _legacy_matches_url(tool_conf):
+        return False
+    if not os.path.exists(os.path.join(config['settings']['base_dir'], tool_conf['exe_path'])):
+        return False
 
-    if os.path.exists(exe_full_path):
-        return exe_full_path
+    store_root = get_store_root(config)
+    os.makedirs(store_root, exist_ok=True)
+    staging_dir = tempfile.mkdtemp(prefix=f".{tool_conf['folder_name']}-staging-", dir=store_root)
+    moved_dir = os.path.join(staging_dir, tool_conf['folder_name'])
+    try:
+        os.replace(legacy_dir, moved_dir)
+        touch_entry(staging_dir)
+        _publish_dir(staging_dir, entry_dir)
+    except OSError as e:
+        # Files in use (Windows) or another drive: put it back and download instead
+        if os.path.exists(moved_dir):
+            try: os.replace(moved_dir, legacy_dir)
+            except OSError: pass
+        out.print(f"[dim]Could not move {legacy_dir} into the store ({e}).[/dim]")
+        return False
+    finally:
+        if os.path.exists(staging_dir):
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    out.print(f"[dim]Moved {tool_name} from {legacy_dir} into the tool store.[/dim]")
+    return True
+
+def _download_and_extract(tool_name: str, config: dict, progress: Progress):
+    """
+    Downloads and extracts a single tool, reporting into an existing Progress display.
+    The archive is fetched into a resumable .part file (segmented when the server
+    supports ranges), verified, extracted into a staging folder and renamed into
+    place once complete. Callers hold the entry lock (see _install_tool).
+    Returns the executable path, or None on failure.
+    """
+    tool_conf = config['tools'][tool_name]
+    entry_dir, exe_full_path = _get_tool_paths(tool_name, config)
+    out = progress.console
+
+    out.print(f"[bold yellow]📦 Tool '{tool_name}' not found. Installing into {entry_dir}...[/bold yellow]")
 
-    console.print(f"[bold yellow]📦 Tool '{tool_name}' not found. Installing into {tool_dir}...[/bold yellow]")
-    
-    # Create the specific folder if it does not exist
-    os.makedirs(tool_dir, exist_ok=True)
+    store_root = get_store_root(config)
+    os.makedirs(store_root, exist_ok=True)
+    staging_dir = tempfile.mkdtemp(prefix=f".{tool_conf['folder_name']}-staging-", dir=store_root)
+    part_path = _get_part_path(entry_dir, config)
 
     url = tool_conf['url']
-    zip_path = os.path.join(base_dir, f"{tool_name}_temp.zip")
-    
+    task = progress.add_task(f"[green]Downloading {tool_name}...", total=None)
+
     try:
-        with requests.get(url, stream=True) as r:
-            r.raise_for_status()
-            total_length = int(r.headers.get('content-length', 0))
-            
-            with Progress() as progress:
-                task = progress.add_task(f"[green]Downloading {tool_name}...", total=total_length)
-                with open(zip_path, 'wb') as f:
-                    for chunk in r.iter_content(chunk_size=8192):
-                        f.write(chunk)
-                        progress.update(task, advance=len(chunk))
-
-        console.print(f"[blue]Extracting {tool_name}...[/blue]")
-        
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            # Extract EVERYTHING to the specific folder for the tool.
-            zip_ref.extractall(tool_dir)
-            
+        with trace.span("download", tool=tool_name):
+            fetch.download_file(url, part_path, progress, task, sha256=tool_conf.get('sha256'))
+
+        progress.update(task, description=f"[blue]Extracting {tool_name}...")
+        # Extract EVERYTHING to the staging folder for the tool (zip or tar.gz/xz, in parallel).
+        with trace.span("extract", tool=tool_name):
+            extract.extract_archive(part_path, os.path.join(staging_dir, tool_conf['folder_name']),
+                                    kind=extract.archive_kind(url))
+
+        touch_entry(staging_dir)
+        _publish_dir(staging_dir, entry_dir)
+        fetch.discard(part_path)
 
     except Exception as e:
-        console.print(f"[bold red]Error installing {tool_name}: {e}[/bold red]")
-        if os.path.exists(tool_dir):
-            shutil.rmtree(tool_dir, ignore_errors=True)
+        # A partial download stays in place: the next attempt resumes it
+        out.print(f"[bold red]Error installing {tool_name}: {e}[/bold red]")
+        progress.update(task, description=f"[red]{tool_name} failed")
         return None
-    
+
     finally:
-        if os.path.exists(zip_path):
-            os.remove(zip_path)
+        if os.path.exists(staging_dir):
+            shutil.rmtree(staging_dir, ignore_errors=True)
 
     # Final verification
     if os.path.exists(exe_full_path):
-        console.print(f"[bold green]✅ {tool_name} installed successfully![/bold green]")
+        progress.update(task, description=f"[green]{tool_name} ready")
+        out.print(f"[bold green]✅ {tool_name} installed successfully![/bold green]")
         return exe_full_path
     else:
-        console.print(f"[bold red]❌ Installation seems to have failed. File not found: {exe_full_path}[/bold red]")
-        # Debug: List files to understand structure
-        # console.print(f"Content of {tool_dir}: {os.listdir(tool_dir)}")
-        return None
\ No newline at end of file
+        progress.update(task, description=f"[red]{tool_name} failed")
+        out.print(f"[bold red]❌ Installation seems to have failed. File not found: {exe_full_path}[/bold red]")
+        return None
+
+# Resolved paths for this process, keyed by (tool, url). Lets long-lived sessions
+# (interactive shell, watch mode) skip the store lookup on every command. Entries
+# are still touched every TOUCH_INTERVAL seconds, so 'pck tools gc' sees them in use.
+TOUCH_INTERVAL = 600
+_resolved_cache = {}  # key -> [exe path, entry dir, last touch (monotonic)]
+
+def _cache_key(tool_name: str, config: dict):
+    return tool_name, config['tools'][tool_name]['url']
+
+def _remember(tool_name: str, config: dict, exe_path):
+    entry_dir, _ = _get_tool_paths(tool_name, config)
+    _resolved_cache[_cache_key(tool_name, config)] = [exe_path, entry_dir, time.monotonic()]
+
+def _cached_path(tool_name: str, config: dict):
+    cached = _resolved_cache.get(_cache_key(tool_name, config))
+    if not cached or not os.path.exists(cached[0]):
+        return None
+    if time.monotonic() - cached[2] >= TOUCH_INTERVAL:
+        touch_entry(cached[1])
+        cached[2] = time.monotonic()
+    return cached[0]
+
+def ensure_tool_installed(tool_name: str, config: dict):
+    with trace.span("ensure_tool_installed", tool=tool_name):
+        return _ensure_tool_installed(tool_name, config)
+
+def _ensure_tool_installed(tool_name: str, config: dict):
+    cached = _cached_path(tool_name, config)
+    if cached:
+        return cached
+
+    entry_dir, exe_full_path = _get_tool_paths(tool_name, config)
+    if os.path.exists(exe_full_path):
+        touch_entry(entry_dir)
+        _remember(tool_name, config, exe_full_path)
+        return exe_full_path
+
+    with Progress(console=console) as progress:
+        exe_path = _install_tool(tool_name, config, progress)
+    if exe_path:
+        _remember(tool_name, config, exe_path)
+    return exe_path
+
+def ensure_tools_installed(tool_names, config: dict, max_workers=None):
+    """
+    Batch version of ensure_tool_installed.
+    Missing tools are downloaded and extracted in parallel under a single progress display.
+    Returns a {tool_name: exe_path or None} map that callers should reuse.
+    """
+    with trace.span("ensure_tools_installed", tools=list(tool_names)):
+        return _ensure_tools_installed(tool_names, config, max_workers)
+
+def _ensure_tools_installed(tool_names, config: dict, max_workers=None):
+    resolved = {}
+    missing = []
+    for name in dict.fromkeys(tool_names):  # de-duplicate, keep order
+        cached = _cached_path(name, config)
+        if cached:
+            resolved[name] = cached
+            continue
+        entry_dir, exe_full_path = _get_tool_paths(name, config)
+        if os.path.exists(exe_full_path):
+            touch_entry(entry_dir)
+            resolved[name] = exe_full_path
+            _remember(name, config, exe_full_path)
+        else:
+            missing.append(name)
+
+    if not missing:
+        return resolved
+
+    workers = max_workers or len(missing)
+    with Progress(console=console) as progress:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {name: pool.submit(_install_tool, name, config, progress) for name in missing}
+            for name, future in futures.items():
+                resolved[name] = future.result()
+                if resolved[name]:
+                    _remember(name, config, resolved[name])
+
+    return resolved
@@ -0,0 +1,334 @@
+import io
+import os
+import stat
+import time
+import shutil
+import tarfile
+import zipfile
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Parallel archive extraction for tool installs.
+# - zip: entries are spread over worker threads, each with its own ZipFile handle
+#   when the source can be reopened (path or bytes). zlib releases the GIL, so
+#   inflating really runs on several cores.
+# - tar.gz / tar.xz / tar.bz2: the compressed stream is sequential, so members are
+#   decoded in order and their files written by the workers.
+# The directory tree is created up front; permissions and timestamps are restored.
+# With a single worker the pools only cost time: extraction is delegated to
+# ZipFile/TarFile.extractall, behind the same path and symlink checks, then file
+# permissions and timestamps are restored as in the parallel path.
+# Tar archives use the stdlib 'data' filter directly when it exists; one with an
+# escaping member is then extracted again through pck's own, skipping, filter.
+COPY_BUFFER = 1024 * 1024
+SERIAL_THRESHOLD = 64          # fewer entries than this: not worth a thread pool
+INLINE_TAR_MEMBER = 8 * 1024 * 1024  # bigger tar members are written by the reader itself
+MAX_PENDING_WRITES = 256
+
+TAR_SUFFIXES = (".tar.gz", ".tgz", ".tar.xz", ".txz", ".tar.bz2", ".tbz2", ".tar")
+
+def default_workers():
+    """Two threads per usable core (file creation blocks on I/O); 1 means serial."""
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    return 1 if cores == 1 else min(16, cores * 2)
+
+def archive_kind(name):
+    """'zip' or 'tar' from a file name or URL (query string ignored)."""
+    path = name.split("?", 1)[0].lower()
+    return "tar" if path.endswith(TAR_SUFFIXES) else "zip"
+
+def _safe_target(dest_dir, member_name):
+    """Destination of an archive member, or None when it would escape dest_dir."""
+    parts = [p for p in member_name.replace("\\", "/").split("/") if p not in ("", ".")]
+    if not parts or ".." in parts or ":" in parts[0]:
+        return None
+    return os.path.join(dest_dir, *parts)
+
+def _link_escapes(dest_dir, target, link):
+    """True for absolute symlinks or ones resolving outside dest_dir."""
+    if os.path.isabs(link):
+        return True
+    resolved = os.path.normpath(os.path.join(os.path.dirname(target), link))
+    return os.path.commonpath([dest_dir, resolved]) != dest_dir
+
+def _apply_metadata(path, mode, mtime):
+    # Plain rw files already have the right mode: only executable or read-only ones need a chmod
+    if mode is not None and os.name != "nt" and (mode & 0o111 or not mode & stat.S_IWUSR):
+        os.chmod(path, mode)
+    if mtime is not None:
+        try:
+            os.utime(path, (mtime, mtime))
+        except OSError:
+            pass
+
+def _finish_dirs(dir_metadata):
+    """Directory times are set last (writing files into them updates their mtime), deepest first."""
+    for path in sorted(dir_metadata, key=len, reverse=True):
+        _apply_metadata(path, *dir_metadata[path])
+
+def _balance(items, size_of, bins):
+    """Greedy largest-first partition of items into 'bins' lists of similar total size."""
+    buckets = [[] for _ in range(bins)]
+    totals = [0] * bins
+    for item in sorted(items, key=size_of, reverse=True):
+        i = totals.index(min(totals))
+        buckets[i].append(item)
+        totals[i] += size_of(item) + 4096  # per-file overhead: small files still cost a create
+    return [b for b in buckets if b]
+
+# --- ZIP ---
+def _zip_mode(info):
+    """Unix permission bits stored by the archiver, or None (archives made on Windows)."""
+    unix_mode = info.external_attr >> 16
+    if info.create_system == 3 and unix_mode:
+        return unix_mode
+    return None
+
+def _zip_mtime(info):
+    try:
+        return time.mktime(info.date_time + (0, 0, -1))
+    except (OverflowError, ValueError):
+        return None
+
+def _extract_zip_entries(open_zip, dest_dir, entries):
+    written = 0
+    with open_zip() as zf:
+        for info, target in entries:
+            mode = _zip_mode(info)
+            if mode is not None and stat.S_ISLNK(mode) and os.name != "nt":
+                link = zf.read(info).decode("utf-8")
+                if _link_escapes(dest_dir, target, link):
+                    continue
+                if os.path.lexists(target):
+                    os.remove(target)
+                os.symlink(link, target)
+                written += 1
+                continue
+            with open(target, "wb") as dst:
+                if info.file_size <= COPY_BUFFER:
+                    dst.write(zf.read(info))
+                else:
+                    with zf.open(info) as src:
+                        shutil.copyfileobj(src, dst, COPY_BUFFER)
+            _apply_metadata(target, stat.S_IMODE(mode) if mode else None, _zip_mtime(info))
+            written += 1
+    return written
+
+def _extract_zip_serial(zf, dest_dir):
+    files, links, metadata, dir_metadata = [], [], [], {}
+    for info in zf.infolist():
+        target = _safe_target(dest_dir, info.filename)
+        if target is None:
+            continue
+        mode = _zip_mode(info)
+        if mode is not None and stat.S_ISLNK(mode) and os.name != "nt":
+            links.append((info, target))
+            continue
+        files.append(info)
+        if info.is_dir():
+            dir_metadata[target] = (None, _zip_mtime(info))
+        else:
+            metadata.append((target, stat.S_IMODE(mode) if mode else None, _zip_mtime(info)))
+
+    zf.extractall(dest_dir, files)
+    for target, mode, mtime in metadata:
+        _apply_metadata(target, mode, mtime)
+    count = sum(not info.is_dir() for info in files)
+    for info, target in links:
+        link = zf.read(info).decode("utf-8")
+        if _link_escapes(dest_dir, target, link):
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if os.path.lexists(target):
+            os.remove(target)
+        os.symlink(link, target)
+        count += 1
+    _finish_dirs(dir_metadata)
+    return count
+
+def _extract_zip(source, dest_dir, workers):
+    if workers <= 1:
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = io.BytesIO(source)
+        with zipfile.ZipFile(source) as zf:
+            return _extract_zip_serial(zf, dest_dir)
+
+    shared = None
+    if isinstance(source, (str, os.PathLike)):
+        open_zip = lambda: zipfile.ZipFile(source)
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        open_zip = lambda: zipfile.ZipFile(io.BytesIO(source))
+    else:
+        # Single file object (e.g. a spooled download): workers share it. ZipFile
+        # serializes the raw reads, decompression still runs in parallel.
+        shared = zipfile.ZipFile(source)
+        open_zip = lambda: nullcontext(shared)
+
+    try:
+        return _extract_zip_from(open_zip, dest_dir, workers)
+    finally:
+        if shared is not None:
+            shared.close()
+
+def _extract_zip_from(open_zip, dest_dir, workers):
+    with open_zip() as zf:
+        infos = zf.infolist()
+
+    files, dir_metadata = [], {}
+    for info in infos:
+        target = _safe_target(dest_dir, info.filename)
+        if target is None:
+            continue
+        if info.is_dir():
+            dir_metadata[target] = (None, _zip_mtime(info))
+        else:
+            files.append((info, target))
+
+    # Pre-create the whole tree once, instead of a makedirs() per file in the workers
+    for path in sorted(set(dir_metadata) | {os.path.dirname(t) for _, t in files}):
+        os.makedirs(path, exist_ok=True)
+
+    if len(files) < SERIAL_THRESHOLD or workers <= 1:
+        count = _extract_zip_entries(open_zip, dest_dir, files)
+    else:
+        buckets = _balance(files, lambda e: e[0].compress_size, workers)
+        with ThreadPoolExecutor(max_workers=len(buckets)) as pool:
+            count = sum(pool.map(lambda b: _extract_zip_entries(open_zip, dest_dir, b), buckets))
+
+    _finish_dirs(dir_metadata)
+    return count
+
+# --- TAR ---
+def _write_file(target, data, mode, mtime):
+    with open(target, "wb") as f:
+        f.write(data)
+    _apply_metadata(target, mode, mtime)
+
+def _extract_tar_serial(tar, dest_dir, seekable):
+    if hasattr(tarfile, "data_filter") and seekable:
+        # The stdlib filter alone: a Python wrapper around it costs time on every member.
+        # It refuses (raises on) unsafe members where ours skips them: redo those archives
+        try:
+            tar.extractall(dest_dir, filter="data")
+            return sum(not m.isdir() for m in tar.getmembers())
+        except tarfile.FilterError:
+            pass
+
+    count = 0
+
+    def safe_member(member, path):
+        nonlocal count
+        target = _safe_target(dest_dir, member.name)
+        if target is None:
+            return None
+        if member.issym() and _link_escapes(dest_dir, target, member.linkname):
+            return None
+        if member.islnk() and _safe_target(dest_dir, member.linkname) is None:
+            return None
+        if hasattr(tarfile, "data_filter"):
+            try:
+                member = tarfile.data_filter(member, path)
+            except tarfile.FilterError:
+                return None
+        if not member.isdir():
+            count += 1
+        return member
+
+    if hasattr(tarfile, "data_filter"):
+        tar.extractall(dest_dir, filter=safe_member)
+    else:
+        tar.extractall(dest_dir, members=(m for m in tar if safe_member(m, dest_dir)))
+    return count
+
+def _extract_tar(source, dest_dir, workers):
+    seekable = isinstance(source, (str, os.PathLike, bytes, bytearray, memoryview))
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    # Stream mode reads 10 KiB records: only worth it when feeding the pool
+    mode = "r:*" if workers <= 1 and seekable else "r|*"
+    if isinstance(source, (str, os.PathLike)):
+        tar = tarfile.open(source, mode=mode)
+    else:
+        tar = tarfile.open(fileobj=source, mode=mode)
+    if workers <= 1:
+        with tar:
+            return _extract_tar_serial(tar, dest_dir, seekable)
+
+    count = 0
+    created_dirs = set()
+    dir_metadata = {}
+    links = []
+    pending = set()
+
+    def ensure_dir(path):
+        if path not in created_dirs:
+            os.makedirs(path, exist_ok=True)
+            created_dirs.add(path)
+
+    with tar, ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for member in tar:
+            target = _safe_target(dest_dir, member.name)
+            if target is None:
+                continue
+            mode = stat.S_IMODE(member.mode)
+            if member.isdir():
+                ensure_dir(target)
+                dir_metadata[target] = (mode | stat.S_IWUSR, member.mtime)
+            elif member.isfile():
+                ensure_dir(os.path.dirname(target))
+                src = tar.extractfile(member)
+                if member.size > INLINE_TAR_MEMBER or workers <= 1:
+                    with open(target, "wb") as dst:
+                        shutil.copyfileobj(src, dst, COPY_BUFFER)
+                    _apply_metadata(target, mode, member.mtime)
+                else:
+                    pending.add(pool.submit(_write_file, target, src.read(), mode, member.mtime))
+                    if len(pending) >= MAX_PENDING_WRITES:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            future.result()
+                count += 1
+            elif member.issym() or member.islnk():
+                links.append((member, target))
+
+        for future in pending:
+            future.result()
+
+    # Links last: their targets exist by now
+    for member, target in links:
+        ensure_dir(os.path.dirname(target))
+        if os.path.lexists(target):
+            os.remove(target)
+        if member.issym():
+            if _link_escapes(dest_dir, target, member.linkname):
+                continue
+            if os.name == "nt":
+                resolved = os.path.normpath(os.path.join(os.path.dirname(target), member.linkname))
+                if os.path.isfile(resolved):
+                    shutil.copy2(resolved, target)
+                continue
+            os.symlink(member.linkname, target)
+        else:
+            source_path = _safe_target(dest_dir, member.linkname)
+            if source_path is None or not os.path.exists(source_path):
+                continue
+            try:
+                os.link(source_path, target)
+            except OSError:
+                shutil.copy2(source_path, target)
+        count += 1
+
+    _finish_dirs(dir_metadata)
+    return count
+
+def extract_archive(source, dest_dir, kind="zip", workers=None):
+    """
+    Extracts source (path, bytes or binary file object) into dest_dir.
+    kind is 'zip' or 'tar' (see archive_kind). Returns the number of files written.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    dest_dir = os.path.abspath(dest_dir)
+    workers = workers or default_workers()
+    if kind == "tar":
+        return _extract_tar(source, dest_dir, workers)
+    return _extract_zip(source, dest_dir, workers)
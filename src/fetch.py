@@ -0,0 +1,274 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+# Download engine for tool archives:
+# - one pooled requests.Session per process (keep-alive across tools and segments);
+# - big files are fetched as parallel HTTP Range segments when the server allows it;
+# - progress lives in '<file>.part' + '<file>.part.json', so an interrupted
+#   download resumes where it stopped instead of starting over;
+# - 1 MiB reads, buffered writes and at most ~10 progress refreshes per second;
+# - a segment's progress is only recorded once its bytes are flushed and fsynced,
+#   so a resume never skips bytes that were still in a write buffer.
+CHUNK_SIZE = 1024 * 1024
+WRITE_BUFFER = 4 * 1024 * 1024
+MAX_SEGMENTS = 4
+MIN_SEGMENT_SIZE = 4 * 1024 * 1024
+RETRIES = 3
+TIMEOUT = (10, 60)  # connect, read
+PROGRESS_INTERVAL = 0.1
+STATE_INTERVAL = 16 * 1024 * 1024  # bytes between two resume state saves
+STATE_VERSION = 1
+STOP_TIMEOUT = 5  # seconds given to segment threads to flush after an interruption
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=MAX_SEGMENTS * 4)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+def _probe(session, url):
+    """Returns (final url, size or None, accepts ranges, validator) without downloading the body."""
+    r = session.head(url, allow_redirects=True, timeout=TIMEOUT)
+    if r.status_code >= 400:
+        # Some servers refuse HEAD: ask for the first byte instead
+        r = session.get(url, headers={"Range": "bytes=0-0"}, stream=True, timeout=TIMEOUT)
+        r.close()
+        r.raise_for_status()
+        if r.status_code == 206:
+            total = r.headers.get("Content-Range", "").rpartition("/")[2]
+            size = int(total) if total.isdigit() else None
+            return r.url, size, size is not None, r.headers.get("ETag") or r.headers.get("Last-Modified")
+    size = r.headers.get("Content-Length")
+    size = int(size) if size and size.isdigit() else None
+    ranges = r.headers.get("Accept-Ranges", "").lower() == "bytes"
+    return r.url, size, ranges, r.headers.get("ETag") or r.headers.get("Last-Modified")
+
+def _plan(size, ranges):
+    """[[start, end (inclusive), bytes done]] for each segment."""
+    if not size:
+        return [[0, None, 0]]
+    count = min(MAX_SEGMENTS, size // MIN_SEGMENT_SIZE) if ranges else 1
+    count = max(1, count)
+    step = -(-size // count)
+    return [[start, min(start + step, size) - 1, 0] for start in range(0, size, step)]
+
+class _Progress:
+    """Thread-safe byte counter forwarding to a rich Progress task at most every PROGRESS_INTERVAL."""
+
+    def __init__(self, progress, task, done):
+        self.progress = progress
+        self.task = task
+        self.lock = threading.Lock()
+        self.pending = done
+        self.last = 0.0
+
+    def advance(self, n, force=False):
+        with self.lock:
+            self.pending += n
+            now = time.monotonic()
+            if not force and now - self.last < PROGRESS_INTERVAL:
+                return
+            pending, self.pending, self.last = self.pending, 0, now
+        if self.progress is not None and pending:
+            self.progress.update(self.task, advance=pending)
+
+class _State:
+    """Resume metadata next to the .part file."""
+
+    def __init__(self, path, url, size, validator, segments):
+        self.path = path
+        self.data = {"version": STATE_VERSION, "url": url, "size": size,
+                     "validator": validator, "segments": segments}
+        self.lock = threading.Lock()
+        self.unsaved = 0
+        self.stopped = threading.Event()  # Set to make segment threads flush and return
+
+    @classmethod
+    def load(cls, path, url, size, validator):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (data.get("version"), data.get("url"), data.get("size"), data.get("validator")) != \
+                (STATE_VERSION, url, size, validator):
+            return None
+        return cls(path, url, size, validator, data["segments"])
+
+    @property
+    def segments(self):
+        return self.data["segments"]
+
+    def record(self, segment, n):
+        """Counts n bytes of segment as persisted: only call it once they are flushed to disk."""
+        with self.lock:
+            segment[2] += n
+            self.unsaved += n
+            if self.unsaved >= STATE_INTERVAL:
+                self._save()
+
+    def save(self):
+        with self.lock:
+            self._save()
+
+    def _save(self):
+        self.unsaved = 0
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f)
+        os.replace(tmp_path, self.path)
+
+def _persist(f):
+    f.flush()
+    os.fsync(f.fileno())
+
+def _fetch_segment(session, url, part_path, segment, state, counter):
+    """Downloads one [start, end, done] segment into part_path, retrying from where it stopped."""
+    for attempt in range(RETRIES + 1):
+        start, end, done = segment
+        if end is not None and start + done > end:
+            return
+        headers = {}
+        if end is not None:
+            headers["Range"] = f"bytes={start + done}-{end}"
+        elif done:
+            headers["Range"] = f"bytes={done}-"
+        try:
+            with session.get(url, headers=headers, stream=True, timeout=TIMEOUT) as r:
+                r.raise_for_status()
+                if headers and r.status_code != 206:
+                    if end is not None and (start or end != state.data["size"] - 1):
+                        raise IOError("Server ignored the Range request")
+                    # Whole body sent again: restart this (single) segment from 0
+                    state.record(segment, -segment[2])
+                    start, done = 0, 0
+                mode = "r+b" if os.path.exists(part_path) else "wb"
+                with open(part_path, mode, buffering=WRITE_BUFFER) as f:
+                    f.seek(start + done)
+                    if end is None and not done:
+                        f.truncate()
+                    unflushed = 0
+                    try:
+                        for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+                            if state.stopped.is_set():
+                                break
+                            f.write(chunk)
+                            unflushed += len(chunk)
+                            counter.advance(len(chunk))
+                            if unflushed >= WRITE_BUFFER:
+                                _persist(f)
+                                state.record(segment, unflushed)
+                                unflushed = 0
+                    finally:
+                        # Also on errors: what reached the file is valid and need not be fetched again
+                        _persist(f)
+                        state.record(segment, unflushed)
+            return
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError):
+            if attempt == RETRIES:
+                raise
+            time.sleep(0.5 * (attempt + 1))
+
+def _missing_bytes(segments, part_path):
+    """Bytes the segments still lack (a size-less download can only be checked against the file)."""
+    missing = 0
+    for start, end, done in segments:
+        if end is None:
+            missing += abs(os.path.getsize(part_path) - done)
+        else:
+            missing += max(0, end + 1 - (start + done))
+    return missing
+
+def _sha256_file(path):
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def download_file(url, part_path, progress=None, task=None, sha256=None):
+    """
+    Downloads url into part_path, resuming a previous attempt when possible.
+    When sha256 is given the file is verified (ValueError and discarded on a
+    mismatch). On any other failure the .part file and its state are kept for
+    the next attempt; call discard() to drop them.
+    """
+    session = get_session()
+    final_url, size, ranges, validator = _probe(session, url)
+    state_path = part_path + ".json"
+
+    state = None
+    if os.path.exists(part_path) and (ranges or size is None):
+        state = _State.load(state_path, url, size, validator)
+    if state is None:
+        state = _State(state_path, url, size, validator, _plan(size, ranges))
+        with open(part_path, "wb") as f:
+            if size:
+                f.truncate(size)  # Pre-sized: every segment writes at its own offset
+    state.save()
+
+    done = sum(s[2] for s in state.segments)
+    if progress is not None:
+        progress.update(task, total=size, completed=0)
+    counter = _Progress(progress, task, done)
+
+    try:
+        segments = state.segments
+        if len(segments) == 1:
+            _fetch_segment(session, final_url, part_path, segments[0], state, counter)
+        else:
+            threads_errors = []
+            def worker(segment):
+                try:
+                    _fetch_segment(session, final_url, part_path, segment, state, counter)
+                except Exception as e:
+                    threads_errors.append(e)
+            threads = [threading.Thread(target=worker, args=(s,), daemon=True) for s in segments]
+            try:
+                for t in threads:
+                    t.start()
+                for t in threads:
+                    t.join()
+            finally:
+                # Ctrl-C or a failed segment: let the others flush what they wrote before the final save
+                state.stopped.set()
+                for t in threads:
+                    if t.ident is not None:
+                        t.join(STOP_TIMEOUT)
+            if threads_errors:
+                raise threads_errors[0]
+    finally:
+        counter.advance(0, force=True)
+        state.save()
+
+    # The .part file is pre-sized, so its length says nothing: every segment has to cover its range
+    missing = _missing_bytes(state.segments, part_path)
+    if missing:
+        raise IOError(f"Incomplete download ({missing} bytes missing, will resume on the next attempt)")
+    os.remove(state_path)
+    if sha256:
+        # Segments land out of order: hashing has to wait for the complete file
+        digest = _sha256_file(part_path)
+        if digest != sha256.lower():
+            discard(part_path)
+            raise ValueError(f"Checksum mismatch (expected {sha256.lower()}, got {digest})")
+
+def discard(part_path):
+    for path in (part_path, part_path + ".json"):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
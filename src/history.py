@@ -0,0 +1,239 @@
+import os
+import sys
+import json
+import time
+from src import trace
+
+# Timing history: one row per pck command in a local SQLite file, read by 'pck stats'.
+# A row holds the command, project folder, language, total time, exit code, the
+# time spent in each trace span (tool resolution, compile, execute...) and the
+# counters of the run (build cache hits...). The total starts at process start, so
+# interpreter startup and imports count too (also kept as the 'startup' phase).
+# Recording only sums span durations in memory; sqlite3 is imported and the row
+# written once the command is over.
+# PCK_STATS_DB moves the database, PCK_NO_STATS=1 turns recording off.
+DB_ENV = "PCK_STATS_DB"
+DISABLE_ENV = "PCK_NO_STATS"
+DEFAULT_DB = os.path.join(os.path.expanduser("~"), ".pck_stats.sqlite")
+SCHEMA_VERSION = 1
+
+# Regression check: the last RECENT_RUNS runs against the BASELINE_RUNS before them
+RECENT_RUNS = 5
+BASELINE_RUNS = 20
+MIN_BASELINE_RUNS = 5
+REGRESSION_THRESHOLD = 0.25
+
+_current = None
+_process_t0 = None  # perf_counter() value at process start, until the first command uses it
+
+def get_db_path():
+    return os.environ.get(DB_ENV) or DEFAULT_DB
+
+def _process_age():
+    """Seconds since this process started (interpreter init included), None when unknown."""
+    try:
+        with open("/proc/self/stat", "rb") as f:
+            start_ticks = int(f.read().rpartition(b")")[2].split()[19])
+        with open("/proc/uptime", "rb") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+def mark_process_start(t0):
+    """
+    Called first thing by main.py with time.perf_counter(): the first command's
+    duration then includes startup (imports), or the whole process age where the
+    OS reports it. Later commands of the interactive shell start at their callback.
+    """
+    global _process_t0
+    age = _process_age()
+    now = time.perf_counter()
+    _process_t0 = min(t0, now - age) if age is not None else t0
+
+def start(command):
+    """Starts recording the current command (no-op when PCK_NO_STATS is set)."""
+    global _current, _process_t0
+    t0, _process_t0 = _process_t0, None
+    if os.environ.get(DISABLE_ENV):
+        return
+    now = time.perf_counter()
+    t0 = now if t0 is None else t0
+    _current = {
+        "command": command,
+        "project": os.getcwd(),
+        "lang": None,
+        "exit_code": None,
+        "started": time.time() - (now - t0),
+        "t0": t0,
+        "startup_ms": (now - t0) * 1000,
+    }
+    trace.record_phases()
+
+def note(**fields):
+    """Sets fields of the current record, e.g. note(lang="python", exit_code=rc)."""
+    if _current is not None:
+        _current.update(fields)
+
+def discard():
+    """
+    Drops the current record, for commands whose duration means nothing (watch mode,
+    the interactive shell: its first command must not count the time spent before it).
+    """
+    global _current, _process_t0
+    _current = _process_t0 = None
+
+def _exit_code_of(exc):
+    if exc is None:
+        return 0
+    code = getattr(exc, "exit_code", None)  # typer.Exit
+    if code is None and isinstance(exc, SystemExit):
+        code = exc.code if isinstance(exc.code, int) else (0 if exc.code is None else 1)
+    return 1 if code is None else code
+
+def finish():
+    """
+    Writes the current record. Meant for ctx.call_on_close: a typer.Exit being
+    raised gives the exit code, unless the command noted its own (child process).
+    """
+    global _current
+    record, _current = _current, None
+    if record is None:
+        return
+    duration_ms = (time.perf_counter() - record["t0"]) * 1000
+    exit_code = record["exit_code"]
+    if exit_code is None:
+        exit_code = _exit_code_of(sys.exc_info()[1])
+    phases, counters = trace.phases()
+    phases = dict(phases or {})
+    if record["startup_ms"] >= 1:
+        phases["startup"] = (record["startup_ms"], 1)
+    try:
+        _insert(get_db_path(), (
+            record["started"], record["command"], record["project"], record["lang"],
+            duration_ms, exit_code,
+            json.dumps({name: round(total, 3) for name, (total, _) in phases.items()}),
+            json.dumps(counters or {}),
+        ))
+    except Exception:
+        pass  # Statistics must never break a command (read-only home, locked db...)
+
+# --- DATABASE ---
+def _connect(db_path):
+    import sqlite3
+
+    conn = sqlite3.connect(db_path, timeout=2.0)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")  # No fsync per row in WAL mode
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS runs (
+            id INTEGER PRIMARY KEY,
+            started REAL NOT NULL,
+            command TEXT NOT NULL,
+            project TEXT NOT NULL,
+            lang TEXT,
+            duration_ms REAL NOT NULL,
+            exit_code INTEGER NOT NULL,
+            phases TEXT NOT NULL,
+            counters TEXT NOT NULL
+        )""")
+    conn.execute("CREATE INDEX IF NOT EXISTS runs_command_project ON runs (command, project, started)")
+    conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+    return conn
+
+def _insert(db_path, row):
+    conn = _connect(db_path)
+    try:
+        with conn:
+            conn.execute("INSERT INTO runs (started, command, project, lang, duration_ms, exit_code, phases, counters) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row)
+    finally:
+        conn.close()
+
+def load_runs(db_path=None, command=None, project=None, since=None):
+    """[{started, command, project, lang, duration_ms, exit_code, phases, counters}] oldest first."""
+    db_path = db_path or get_db_path()
+    if not os.path.exists(db_path):
+        return []
+    query, params = "SELECT started, command, project, lang, duration_ms, exit_code, phases, counters FROM runs WHERE 1=1", []
+    for column, value in (("command", command), ("project", project)):
+        if value:
+            query += f" AND {column} = ?"
+            params.append(value)
+    if since:
+        query += " AND started >= ?"
+        params.append(since)
+    conn = _connect(db_path)
+    try:
+        rows = conn.execute(query + " ORDER BY started", params).fetchall()
+    finally:
+        conn.close()
+    keys = ("started", "command", "project", "lang", "duration_ms", "exit_code", "phases", "counters")
+    runs = [dict(zip(keys, row)) for row in rows]
+    for run in runs:
+        run["phases"] = json.loads(run["phases"])
+        run["counters"] = json.loads(run["counters"])
+    return runs
+
+# --- REPORT ---
+def percentile(values, p):
+    """Linear interpolation between closest ranks (p in 0..100)."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = (len(ordered) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+def _median(values):
+    return percentile(values, 50)
+
+def _regression(runs):
+    """
+    (ratio, worst phase name or None) when the median of the recent runs is more
+    than REGRESSION_THRESHOLD above the median of the baseline runs, else None.
+    Only successful runs are compared.
+    """
+    ok = [r for r in runs if r["exit_code"] == 0]
+    recent = ok[-RECENT_RUNS:]
+    baseline = ok[-(RECENT_RUNS + BASELINE_RUNS):-RECENT_RUNS]
+    if len(recent) < RECENT_RUNS or len(baseline) < MIN_BASELINE_RUNS:
+        return None
+    before = _median([r["duration_ms"] for r in baseline])
+    after = _median([r["duration_ms"] for r in recent])
+    if not before or after <= before * (1 + REGRESSION_THRESHOLD):
+        return None
+
+    # The phase that grew the most, in absolute time
+    worst, worst_delta = None, 0.0
+    for name in {name for r in recent for name in r["phases"]}:
+        delta = _median([r["phases"].get(name, 0.0) for r in recent]) - \
+            _median([r["phases"].get(name, 0.0) for r in baseline])
+        if delta > worst_delta:
+            worst, worst_delta = name, delta
+    return after / before, worst
+
+def summarize(runs):
+    """One row per (command, project): runs, p50/p95, failures, cache hit rate, regression."""
+    groups = {}
+    for run in runs:
+        groups.setdefault((run["command"], run["project"]), []).append(run)
+
+    rows = []
+    for (command, project), group in sorted(groups.items()):
+        durations = [r["duration_ms"] for r in group]
+        hits = sum(r["counters"].get("build_cache_hit", 0) for r in group)
+        misses = sum(r["counters"].get("build_cache_miss", 0) for r in group)
+        rows.append({
+            "command": command,
+            "project": project,
+            "runs": len(group),
+            "failures": sum(r["exit_code"] != 0 for r in group),
+            "p50": percentile(durations, 50),
+            "p95": percentile(durations, 95),
+            "last": group[-1]["duration_ms"],
+            "cache_hit_rate": hits / (hits + misses) if hits + misses else None,
+            "regression": _regression(group),
+        })
+    return rows
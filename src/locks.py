@@ -0,0 +1,86 @@
+import os
+import time
+from contextlib import contextmanager
+
+# Cross-process file locks (flock on POSIX, msvcrt on Windows), used wherever
+# several pck processes can touch the same files: the tool store shared by every
+# project, the Python venv templates, and per project .conan_store, .zig-cache
+# and the compiler wrappers.
+# The lock belongs to the open file, so threads of one process exclude each other
+# too. It is released by the OS if the process dies, never left stale.
+# Project locks live in <project>/.pck_cache/locks, store locks in <store>/.locks.
+LOCKS_DIR = os.path.join(".pck_cache", "locks")
+POLL_INTERVAL = 0.1
+
+if os.name == "nt":
+    import msvcrt
+
+    def _try_lock(f):
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _try_lock(f):
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+    def _unlock(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+def get_lock_path(project_dir, name):
+    return os.path.join(project_dir, LOCKS_DIR, f"{name}.lock")
+
+@contextmanager
+def file_lock(path, on_wait=None, timeout=None):
+    """
+    Holds an exclusive lock on path (created if needed) for the with block.
+    on_wait() is called once if another process holds it; raises TimeoutError
+    after timeout seconds (None waits forever).
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "a+b") as f:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waited = False
+        while not _try_lock(f):
+            if not waited and on_wait:
+                on_wait()
+            waited = True
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"Timed out waiting for {path}")
+            time.sleep(POLL_INTERVAL)
+        try:
+            yield
+        finally:
+            _unlock(f)
+
+def _write_marker(path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(str(time.time()))
+
+@contextmanager
+def first_use(markers, lock_path, on_wait=None):
+    """
+    Serializes the first use of a cache: until every marker file exists, users
+    take the lock one at a time, and the with block gets mark(marker) to call once
+    its part of the cache is really filled (after a successful compile...). The
+    cache folder appearing isn't enough, tools create it before filling it.
+    Once all markers exist nothing is locked (the tool owning the cache handles
+    concurrency).
+    """
+    if all(os.path.exists(marker) for marker in markers):
+        yield lambda marker: None
+        return
+    with file_lock(lock_path, on_wait=on_wait):
+        yield lambda marker: None if os.path.exists(marker) else _write_marker(marker)
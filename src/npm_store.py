@@ -0,0 +1,236 @@
+import os
+import io
+import sys
+import json
+import base64
+import shutil
+import hashlib
+import tarfile
+import platform
+import tempfile
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from rich.console import Console
+from rich.progress import Progress
+from src import trace
+
+console = Console()
+
+# Global, content-addressed npm package store (pnpm-style):
+#   <base_dir>/npm_store/<algo>-<hex digest>/<package files>
+# Each package version is downloaded and unpacked once per machine, then project
+# node_modules trees are materialized from it with hardlinks.
+NPM_STORE_DIR = "npm_store"
+LOCKFILE = "package-lock.json"
+DOWNLOAD_WORKERS = 16
+# Left in node_modules trees built from the store: only those have to be deleted
+# before a plain 'npm install' (it would write through the hardlinks)
+LINKED_MARKER = ".pck-store"
+
+# install() outcomes
+INSTALLED = "installed"
+RESOLVE_FAILED = "resolve_failed"  # npm could not resolve the graph: a plain install fails too
+STORE_FAILED = "store_failed"      # the lock can't be materialized from the store
+REBUILD_FAILED = "rebuild_failed"  # the store tree is in place, 'npm rebuild' failed
+
+_NODE_PLATFORMS = {"win32": "win32", "linux": "linux", "darwin": "darwin"}
+_NODE_ARCHS = {"amd64": "x64", "x86_64": "x64", "arm64": "arm64", "aarch64": "arm64", "x86": "ia32", "i686": "ia32"}
+
+def get_store_root(config: dict):
+    return os.path.join(config['settings']['base_dir'], NPM_STORE_DIR)
+
+def integrity_to_dirname(integrity: str):
+    """'sha512-<base64>' -> 'sha512-<hex>' (safe as a folder name)."""
+    # Several hashes may be listed: the first strong one is enough as an address
+    algo, _, b64 = integrity.split()[0].partition("-")
+    return f"{algo}-{base64.b64decode(b64).hex()}"
+
+def _matches_platform(entry):
+    """Mirrors npm's os/cpu filters so platform-specific optional deps are skipped."""
+    node_os = _NODE_PLATFORMS.get(sys.platform, sys.platform)
+    node_cpu = _NODE_ARCHS.get(platform.machine().lower(), platform.machine().lower())
+    for field, current in (("os", node_os), ("cpu", node_cpu)):
+        allowed = entry.get(field)
+        if not allowed:
+            continue
+        if f"!{current}" in allowed:
+            return False
+        positives = [a for a in allowed if not a.startswith("!")]
+        if positives and current not in positives:
+            return False
+    return True
+
+def read_lock_packages(project_dir):
+    """
+    Returns {node_modules path: lock entry} for every installable package of package-lock.json.
+    Raises ValueError for what the store can't materialize (workspaces, links, packages
+    without integrity such as git dependencies): the caller falls back to npm install.
+    """
+    with open(os.path.join(project_dir, LOCKFILE), "r", encoding="utf-8") as f:
+        lock = json.load(f)
+    packages = lock.get("packages")
+    if packages is None:
+        raise ValueError("package-lock.json v1 is not supported (run npm >= 7)")
+    if packages.get("", {}).get("workspaces"):
+        raise ValueError("npm workspaces are not supported")
+
+    result = {}
+    for path, entry in packages.items():
+        if not path.startswith("node_modules/") and "/node_modules/" not in path:
+            continue  # root project
+        if entry.get("inBundle") or not _matches_platform(entry):
+            continue  # Shipped inside its parent's tarball, or for another platform
+        if entry.get("link") or not path.startswith("node_modules/"):
+            raise ValueError(f"{path} is a link or workspace package")
+        if not entry.get("resolved") or not entry.get("integrity"):
+            raise ValueError(f"{path} has no registry tarball ({entry.get('resolved') or 'no resolved URL'})")
+        result[path] = entry
+    return result
+
+def _verify_integrity(data, integrity):
+    for item in integrity.split():
+        algo, _, b64 = item.partition("-")
+        if algo in ("sha512", "sha384", "sha256", "sha1"):
+            if base64.b64encode(hashlib.new(algo, data).digest()).decode() == b64:
+                return True
+    return False
+
+def _extract_tarball(data, dest_dir):
+    """Unpacks an npm tarball, dropping its top-level folder ('package/')."""
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r:gz") as tar:
+        for member in tar.getmembers():
+            parts = member.name.replace("\\", "/").split("/")[1:]
+            if not parts or any(p in ("", ".", "..") for p in parts):
+                continue
+            target = os.path.join(dest_dir, *parts)
+            if member.isdir():
+                os.makedirs(target, exist_ok=True)
+            elif member.isfile():
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with tar.extractfile(member) as src, open(target, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                os.chmod(target, 0o755 if member.mode & 0o111 else 0o644)
+
+def _fetch_into_store(session, store_root, entry):
+    """Makes sure one package version exists in the store. Returns its folder."""
+    entry_dir = os.path.join(store_root, integrity_to_dirname(entry["integrity"]))
+    if os.path.isdir(entry_dir):
+        return entry_dir
+
+    r = session.get(entry["resolved"], timeout=120)
+    r.raise_for_status()
+    if not _verify_integrity(r.content, entry["integrity"]):
+        raise ValueError(f"Integrity check failed for {entry['resolved']}")
+
+    staging_dir = tempfile.mkdtemp(prefix=".staging-", dir=store_root)
+    try:
+        _extract_tarball(r.content, staging_dir)
+        try:
+            os.replace(staging_dir, entry_dir)
+        except OSError:
+            # Another process published the same package meanwhile
+            if not os.path.isdir(entry_dir):
+                raise
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+    return entry_dir
+
+def _link_tree(src_dir, dest_dir, copy=False):
+    for root, dirs, files in os.walk(src_dir):
+        rel_root = os.path.relpath(root, src_dir)
+        target_root = dest_dir if rel_root == "." else os.path.join(dest_dir, rel_root)
+        os.makedirs(target_root, exist_ok=True)
+        for name in files:
+            src = os.path.join(root, name)
+            dst = os.path.join(target_root, name)
+            if copy:
+                shutil.copy2(src, dst)
+                continue
+            try:
+                os.link(src, dst)
+            except OSError:
+                shutil.copy2(src, dst)
+
+def is_store_linked(project_dir):
+    return os.path.exists(os.path.join(project_dir, "node_modules", LINKED_MARKER))
+
+def remove_node_modules(project_dir):
+    """
+    Deletes the project's node_modules. Its files can be hardlinks into the store:
+    anything that writes into the tree (plain 'npm install', scripts) must start
+    from scratch, or the edits would show up in every project.
+    """
+    node_modules = os.path.join(project_dir, "node_modules")
+    if not os.path.exists(node_modules):
+        return
+    # Moved aside first: a half-deleted tree is never left under the real name
+    trash = tempfile.mkdtemp(prefix=".trash-", dir=project_dir)
+    os.replace(node_modules, os.path.join(trash, "node_modules"))
+    shutil.rmtree(trash, ignore_errors=True)
+
+def materialize(config, project_dir, packages):
+    """
+    Fills the store with every package of the lock and rebuilds node_modules from it.
+    Packages with install scripts are copied instead of hardlinked, so their
+    scripts can never modify the shared store.
+    """
+    store_root = get_store_root(config)
+    os.makedirs(store_root, exist_ok=True)
+
+    unique = {}
+    for entry in packages.values():
+        unique.setdefault(integrity_to_dirname(entry["integrity"]), entry)
+
+    missing = [e for name, e in unique.items() if not os.path.isdir(os.path.join(store_root, name))]
+    if missing:
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=DOWNLOAD_WORKERS)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        with Progress(console=console, transient=True) as progress:
+            task = progress.add_task(f"[green]Fetching {len(missing)} package(s) into the store...", total=len(missing))
+            with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as pool:
+                for _ in pool.map(lambda e: _fetch_into_store(session, store_root, e), missing):
+                    progress.update(task, advance=1)
+        session.close()
+
+    # Build the new tree aside, then swap it in
+    node_modules = os.path.join(project_dir, "node_modules")
+    staging = tempfile.mkdtemp(prefix=".node_modules-", dir=project_dir)
+    try:
+        for path, entry in sorted(packages.items()):
+            src = os.path.join(store_root, integrity_to_dirname(entry["integrity"]))
+            dest = os.path.join(staging, *path.split("/")[1:])
+            _link_tree(src, dest, copy=bool(entry.get("hasInstallScript")))
+        open(os.path.join(staging, LINKED_MARKER), "w").close()
+
+        remove_node_modules(project_dir)
+        os.replace(staging, node_modules)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    return len(missing), len(packages)
+
+def install(config, npm_cmd, project_dir, package_names):
+    """
+    npm install through the store: npm only resolves the graph (lockfile),
+    pck fetches/links the packages, then 'npm rebuild' creates .bin links and
+    runs install scripts. Returns INSTALLED, RESOLVE_FAILED, STORE_FAILED or
+    REBUILD_FAILED.
+    """
+    resolve_cmd = npm_cmd + ["install", "--package-lock-only", "--ignore-scripts", "--no-audit", "--no-fund"] + list(package_names)
+    if trace.run(resolve_cmd, cwd=project_dir).returncode != 0:
+        return RESOLVE_FAILED
+
+    try:
+        packages = read_lock_packages(project_dir)
+        downloaded, total = materialize(config, project_dir, packages)
+    except Exception as e:
+        console.print(f"[yellow]npm store not used: {e}.[/yellow]")
+        return STORE_FAILED
+
+    console.print(f"[dim]{total} package(s) linked from the store ({downloaded} downloaded).[/dim]")
+    rebuild_cmd = npm_cmd + ["rebuild", "--no-audit", "--no-fund"]
+    if trace.run(rebuild_cmd, cwd=project_dir).returncode != 0:
+        return REBUILD_FAILED
+    return INSTALLED
@@ -0,0 +1,163 @@
+import os
+import re
+import json
+import hashlib
+import threading
+from src import build_cache
+from src import trace
+
+# Automatic precompiled headers for 'pck run' on C/C++ files.
+# The dependency headers a source includes (those resolved in pck_modules include
+# paths, i.e. installed by Conan and stable between edits) are gathered in one
+# generated header, precompiled once with the exact flags of the build, and passed
+# back with -include-pch. The PCH file name is a hash of the header list, the
+# flags, the compiler and the dependency headers themselves: any change picks a
+# new PCH, stale ones are pruned. Headers those pull in are not part of the key, so
+# a compile that fails with the PCH is retried without it and the PCH dropped.
+# The PCH is planned on build cache misses only.
+PCH_DIR = os.path.join(build_cache.BUILD_CACHE_DIR, "pch")
+KEEP_PCH = 4
+
+_directive_regex = re.compile(r'^\s*#\s*(\w+)\b\s*(?:([<"])([^>"]+)[>"])?', re.MULTILINE)
+_pragma_once_regex = re.compile(r'^\s*#\s*pragma\s+once\b', re.MULTILINE)
+
+def _strip_guard(text, directives):
+    """Drops the include guard (#pragma once or #ifndef/#define...#endif) of a project header."""
+    if directives and directives[0][0] == "pragma" and _pragma_once_regex.search(text):
+        return directives[1:]
+    if len(directives) >= 3 and directives[0][0] == "ifndef" and directives[1][0] == "define" \
+            and directives[-1][0] == "endif":
+        return directives[2:-1]
+    return directives
+
+def dependency_headers(source_path, include_dirs):
+    """
+    Returns [(spelling, resolved path)] of the dependency headers included by
+    source_path or its project headers, in include order. Collection stops at the
+    first directive that is not an #include (include guards aside), in the source
+    or in any project header it pulls in: a macro set by the project could change
+    what the following headers mean.
+    """
+    dep_dirs = [os.path.abspath(d) for d in include_dirs]
+    found = {}
+    seen = set()
+
+    def walk(path, is_source):
+        """Collects the includes of path in order. Returns False once collection must stop."""
+        if path in seen:
+            return True  # Already included once: its guard makes it a no-op
+        seen.add(path)
+        try:
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                text = f.read()
+        except OSError:
+            return False
+
+        directives = _directive_regex.findall(text)
+        if not is_source:
+            directives = _strip_guard(text, directives)
+        for directive, kind, name in directives:
+            if directive != "include" or not name:
+                return False
+            bases = ([os.path.dirname(path)] if kind == '"' else []) + dep_dirs
+            for base in bases:
+                candidate = os.path.abspath(os.path.join(base, name))
+                if not os.path.isfile(candidate):
+                    continue
+                if base in dep_dirs:
+                    found.setdefault(name, candidate)
+                elif not walk(candidate, False):
+                    return False  # Project header with macros/conditionals of its own
+                break
+        return True
+
+    walk(os.path.abspath(source_path), True)
+    return list(found.items())
+
+def _pch_key(headers, compiler_cmd, flags, compiler_path):
+    hasher = hashlib.sha256()
+    hasher.update(json.dumps([name for name, _ in headers] + compiler_cmd + flags).encode("utf-8"))
+    hasher.update(json.dumps([build_cache.file_identity(path) for _, path in headers]).encode("utf-8"))
+    hasher.update(json.dumps(build_cache.file_identity(compiler_path)).encode("utf-8"))
+    return hasher.hexdigest()[:16]
+
+def _prune(pch_dir, keep_key):
+    pchs = []
+    for name in os.listdir(pch_dir):
+        if name.endswith(".pch") and not name.startswith(keep_key):
+            path = os.path.join(pch_dir, name)
+            pchs.append((os.path.getmtime(path), path))
+    for _, path in sorted(pchs, reverse=True)[KEEP_PCH - 1:]:
+        for leftover in (path, path[:-len(".pch")]):
+            try: os.remove(leftover)
+            except OSError: pass
+
+def plan(project_dir, source_path, compiler_cmd, flags, include_dirs, is_cpp):
+    """
+    Decides the PCH of a compile without building it. Scans the source: only call it
+    once the build cache missed.
+    Returns {"headers", "header_path", "pch_path", "failed_marker"}, or None when the
+    source includes no dependency header or this PCH already failed to build.
+    compiler_cmd is [zig, 'cc'|'c++'], flags the exact compile flags.
+    """
+    headers = dependency_headers(source_path, include_dirs)
+    if not headers:
+        return None
+
+    pch_dir = os.path.join(project_dir, PCH_DIR)
+    key = _pch_key(headers, compiler_cmd, flags, compiler_cmd[0])
+    header_path = os.path.join(pch_dir, f"{key}.hpp" if is_cpp else f"{key}.h")
+    failed_marker = os.path.join(pch_dir, f"{key}.failed")
+    if os.path.exists(failed_marker):
+        return None
+    return {
+        "key": key,
+        "headers": headers,
+        "header_path": header_path,
+        "pch_path": header_path + ".pch",
+        "failed_marker": failed_marker,
+        "is_cpp": is_cpp,
+    }
+
+def flags_for(pch_plan):
+    return ["-include-pch", pch_plan["pch_path"]] if pch_plan else []
+
+def build(pch_plan, compiler_cmd, flags, env):
+    """Makes sure the planned PCH exists. Returns False when it could not be built."""
+    pch_path = pch_plan["pch_path"]
+    if os.path.exists(pch_path):
+        return True
+
+    pch_dir = os.path.dirname(pch_path)
+    os.makedirs(pch_dir, exist_ok=True)
+    with open(pch_plan["header_path"], "w", encoding="utf-8") as f:
+        f.write("".join(f"#include <{name}>\n" for name, _ in pch_plan["headers"]))
+
+    tmp_path = f"{pch_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    language = "c++-header" if pch_plan["is_cpp"] else "c-header"
+    cmd = compiler_cmd + ["-x", language, pch_plan["header_path"]] + flags + ["-o", tmp_path]
+    with trace.span("build_pch", headers=len(pch_plan["headers"])):
+        ret = trace.run(cmd, env=env, capture_output=True, text=True)
+    if ret.returncode != 0 or not os.path.exists(tmp_path):
+        # Not retried on every run: the key changes with the flags/deps anyway
+        open(pch_plan["failed_marker"], "w").close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+    os.replace(tmp_path, pch_path)
+    _prune(pch_dir, pch_plan["key"])
+    return True
+
+def reject(pch_plan, fresh):
+    """
+    Called when a compile failed with the PCH but passed without it. An older PCH is
+    dropped (one of the headers it pulls in has probably changed since) so the next
+    run rebuilds it; one built just now is marked failed so it isn't rebuilt every run.
+    """
+    if fresh:
+        open(pch_plan["failed_marker"], "w").close()
+    try:
+        os.remove(pch_plan["pch_path"])
+    except OSError:
+        pass
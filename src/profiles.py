@@ -0,0 +1,59 @@
+import os
+
+# C/C++ build profiles. Each one builds into its own build/<profile> folder, so
+# switching between them never throws away the other build.
+#   dev      fastest compile, for the edit/run loop (default)
+#   release  optimized for this machine, LTO, stripped
+#   profile  optimized with frame pointers and debug info, for perf/VTune/WPA
+# A project can pick its default and override flags in pck.yaml:
+#   profile: release
+#   profiles:
+#     release:
+#       cflags: ["-O3", "-flto", "-march=x86-64-v3"]
+PROJECT_CONFIG = "pck.yaml"
+DEFAULT_PROFILE = "dev"
+
+PROFILES = {
+    "dev": {
+        "cflags": ["-O0"],
+        "ldflags": [],
+    },
+    "release": {
+        # LTO is done by the linker on the -flto objects; see cpp_manager.get_link_flags
+        "cflags": ["-O3", "-flto", "-march=native", "-DNDEBUG"],
+        "ldflags": ["-s"],
+    },
+    "profile": {
+        "cflags": ["-O2", "-g", "-fno-omit-frame-pointer"],
+        "ldflags": [],
+    },
+}
+
+def load_project_config(project_dir):
+    """Contents of <project>/pck.yaml, {} when the file doesn't exist."""
+    path = os.path.join(project_dir, PROJECT_CONFIG)
+    if not os.path.exists(path):
+        return {}
+    import yaml
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+    return data if isinstance(data, dict) else {}
+
+def resolve(project_dir, name=None):
+    """
+    Returns {"name", "cflags", "ldflags"} for the requested profile, falling back
+    to the project's pck.yaml choice, then DEFAULT_PROFILE.
+    Raises ValueError for an unknown profile.
+    """
+    project = load_project_config(project_dir)
+    overrides = project.get("profiles") or {}
+    name = name or project.get("profile") or DEFAULT_PROFILE
+    if name not in PROFILES and name not in overrides:
+        known = sorted(set(PROFILES) | set(overrides))
+        raise ValueError(f"Unknown build profile '{name}' (available: {', '.join(known)})")
+
+    profile = {"name": name, **PROFILES.get(name, {"cflags": [], "ldflags": []})}
+    for field in ("cflags", "ldflags"):
+        if field in (overrides.get(name) or {}):
+            profile[field] = [str(flag) for flag in overrides[name][field]]
+    return profile
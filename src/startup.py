@@ -0,0 +1,63 @@
+import sys
+import time
+import subprocess
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+# Fixed overhead we accept for a trivial command ('pck version'), in milliseconds
+STARTUP_BUDGET_MS = 250
+TOP_IMPORTS = 15
+
+def _parse_importtime(stderr):
+    """Parses '-X importtime' lines into [(module, self_us, cumulative_us, depth)]."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            head, cumulative_us, name = line.split("|", 2)
+            self_us = int(head.split(":", 1)[1])
+            cumulative_us = int(cumulative_us)
+        except ValueError:
+            continue
+        name = name[1:]  # drop the separator space, keep the nesting indent
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((name.strip(), self_us, cumulative_us, depth))
+    return rows
+
+def show_startup_profile(main_script, command=("version",)):
+    """
+    Runs 'pck version' in a fresh interpreter with '-X importtime' and reports
+    the wall time against STARTUP_BUDGET_MS plus the most expensive imports.
+    """
+    frozen = getattr(sys, 'frozen', False)
+    if frozen:
+        # The bundled interpreter can't take -X options: only the wall time is measured
+        cmd = [sys.executable] + list(command)
+    else:
+        cmd = [sys.executable, "-X", "importtime", main_script] + list(command)
+
+    start = time.perf_counter()
+    ret = subprocess.run(cmd, capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    rows = _parse_importtime(ret.stderr)
+    if rows:
+        table = Table(title=f"Slowest imports ('pck {' '.join(command)}')")
+        table.add_column("Module")
+        table.add_column("Self (ms)", justify="right")
+        table.add_column("Cumulative (ms)", justify="right")
+        # Only top-level imports: their cumulative time already includes children
+        top_level = [r for r in rows if r[3] == 0]
+        for name, self_us, cumulative_us, _ in sorted(top_level, key=lambda r: r[2], reverse=True)[:TOP_IMPORTS]:
+            table.add_row(name, f"{self_us / 1000:.1f}", f"{cumulative_us / 1000:.1f}")
+        console.print(table)
+        total_import_ms = sum(r[2] for r in top_level) / 1000
+        console.print(f"[dim]Imports: {total_import_ms:.0f} ms over {len(rows)} modules[/dim]")
+
+    color = "green" if wall_ms <= STARTUP_BUDGET_MS else "red"
+    console.print(f"[bold {color}]Startup: {wall_ms:.0f} ms (budget {STARTUP_BUDGET_MS} ms)[/bold {color}]")
+    if ret.returncode != 0:
+        console.print(f"[red]'pck {' '.join(command)}' exited with code {ret.returncode}[/red]")
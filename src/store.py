@@ -0,0 +1,218 @@
+import os
+import re
+import time
+import shutil
+import hashlib
+from src import locks
+
+# Content-addressed tool store:
+#   <base_dir>/store/<folder_name>-<key>/<folder_name>/...
+# where <key> is derived from the download URL and the expected sha256, so several
+# versions of the same tool can live side by side.
+# Installs from before the store (<base_dir>/<folder_name>) are moved into their
+# entry on first use; the ones left over are listed and evicted by gc as legacy.
+STORE_DIR = "store"
+LAST_USE_FILE = ".pck_last_use"
+# One lock per entry (<store>/.locks/<entry>.lock): a single process installs a
+# tool, the others wait for it and reuse the result
+LOCKS_DIR = ".locks"
+# Resumable downloads (<store>/.downloads/<entry>.part + .part.json). gc drops
+# the ones left untouched for PARTIAL_TTL seconds.
+DOWNLOADS_DIR = ".downloads"
+PARTIAL_TTL = 7 * 86400
+
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+def get_store_root(config: dict):
+    return os.path.join(config['settings']['base_dir'], STORE_DIR)
+
+def store_key(tool_conf: dict):
+    """Stable key for one tool version: hash of its URL and optional checksum."""
+    identity = f"{tool_conf['url']}\n{(tool_conf.get('sha256') or '').lower()}"
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()[:16]
+
+def get_entry_dir(tool_name: str, config: dict):
+    tool_conf = config['tools'][tool_name]
+    return os.path.join(get_store_root(config), f"{tool_conf['folder_name']}-{store_key(tool_conf)}")
+
+def get_legacy_dir(tool_name: str, config: dict):
+    """Where the tool was installed before the store existed."""
+    return os.path.join(config['settings']['base_dir'], config['tools'][tool_name]['folder_name'])
+
+def get_entry_lock_path(entry_dir):
+    return os.path.join(os.path.dirname(entry_dir), LOCKS_DIR, os.path.basename(entry_dir) + ".lock")
+
+def touch_entry(entry_dir):
+    """Records the last time an entry was used (read back by gc)."""
+    marker = os.path.join(entry_dir, LAST_USE_FILE)
+    try:
+        os.utime(marker)
+    except FileNotFoundError:
+        try:
+            with open(marker, "w"):
+                pass
+        except OSError:
+            pass
+    except OSError:
+        pass
+
+def _last_use(entry_dir):
+    marker = os.path.join(entry_dir, LAST_USE_FILE)
+    try:
+        return os.path.getmtime(marker)
+    except OSError:
+        return os.path.getmtime(entry_dir)
+
+def _dir_size(path):
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+def parse_size(text: str):
+    """Parses sizes like '512M', '5G', '1.5GB' or a plain byte count."""
+    match = re.fullmatch(r'\s*([0-9]*\.?[0-9]+)\s*([KMGT]?)I?B?\s*', text.upper())
+    if not match:
+        raise ValueError(f"Invalid size: {text}")
+    number, unit = match.groups()
+    return int(float(number) * _SIZE_UNITS[unit])
+
+def format_size(num_bytes):
+    for unit in ["B", "KB", "MB", "GB"]:
+        if num_bytes < 1024:
+            return f"{num_bytes:.1f} {unit}" if unit != "B" else f"{num_bytes} B"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} TB"
+
+def _partial_downloads(store_root, active):
+    downloads = os.path.join(store_root, DOWNLOADS_DIR)
+    if not os.path.isdir(downloads):
+        return []
+    partials = []
+    for name in os.listdir(downloads):
+        if not name.endswith(".part"):
+            continue
+        path = os.path.join(downloads, name)
+        size, last_use = 0, 0
+        for file in (path, path + ".json"):
+            try:
+                st = os.stat(file)
+            except OSError:
+                continue
+            size += st.st_size
+            last_use = max(last_use, st.st_mtime)
+        if not last_use:
+            continue
+        partials.append({
+            "name": f"{DOWNLOADS_DIR}/{name}",
+            "path": path,
+            "size": size,
+            "last_use": last_use,
+            "active": name[:-len(".part")] in active,
+            "partial": True,
+            "legacy": False,
+        })
+    return partials
+
+def _remove_partial(path):
+    for file in (path, path + ".json"):
+        try:
+            os.remove(file)
+        except OSError:
+            pass
+
+def _legacy_entries(config: dict):
+    entries, seen = [], set()
+    for tool_name in config['tools']:
+        path = get_legacy_dir(tool_name, config)
+        if path in seen or not os.path.isdir(path):
+            continue
+        seen.add(path)
+        entries.append({
+            "name": f"{os.path.basename(path)} (legacy)",
+            "path": path,
+            "size": _dir_size(path),
+            "last_use": os.path.getmtime(path),
+            "active": False,
+            "partial": False,
+            "legacy": True,
+            "lock_path": get_entry_lock_path(get_entry_dir(tool_name, config)),
+        })
+    return entries
+
+def list_entries(config: dict):
+    """
+    Returns [{name, path, size, last_use, active, partial, legacy}] for every store
+    entry, interrupted download and pre-store install, least recently used first.
+    """
+    store_root = get_store_root(config)
+    if not os.path.isdir(store_root):
+        return sorted(_legacy_entries(config), key=lambda e: e["last_use"])
+
+    active = {os.path.basename(get_entry_dir(name, config)) for name in config['tools']}
+    entries = []
+    for name in os.listdir(store_root):
+        path = os.path.join(store_root, name)
+        # Skip staging/trash folders of in-flight installs
+        if name.startswith(".") or not os.path.isdir(path):
+            continue
+        entries.append({
+            "name": name,
+            "path": path,
+            "size": _dir_size(path),
+            "last_use": _last_use(path),
+            "active": name in active,
+            "partial": False,
+            "legacy": False,
+        })
+    entries.extend(_partial_downloads(store_root, active))
+    entries.extend(_legacy_entries(config))
+    entries.sort(key=lambda e: e["last_use"])
+    return entries
+
+def gc(config: dict, max_size: int, dry_run=False):
+    """
+    Evicts least recently used entries until the store fits in max_size bytes.
+    Entries referenced by the current config.yaml are never evicted; partial
+    downloads older than PARTIAL_TTL always are. Legacy installs count as
+    inactive entries.
+    Returns (evicted entries, remaining total size).
+    """
+    entries = list_entries(config)
+    total = sum(e["size"] for e in entries)
+    evicted = []
+    expired_before = time.time() - PARTIAL_TTL
+
+    for entry in entries:
+        expired = entry["partial"] and entry["last_use"] < expired_before
+        if not expired and (total <= max_size or entry["active"]):
+            continue
+        if not dry_run:
+            # Same lock as installs: never delete an entry another process is (re)installing
+            if entry["legacy"]:
+                # Locked like the store entry it would be moved into
+                with locks.file_lock(entry["lock_path"]):
+                    shutil.rmtree(entry["path"], ignore_errors=True)
+            elif entry["partial"]:
+                entry_dir = os.path.join(get_store_root(config), os.path.basename(entry["path"])[:-len(".part")])
+                with locks.file_lock(get_entry_lock_path(entry_dir)):
+                    _remove_partial(entry["path"])
+            else:
+                with locks.file_lock(get_entry_lock_path(entry["path"])):
+                    shutil.rmtree(entry["path"], ignore_errors=True)
+        evicted.append(entry)
+        total -= entry["size"]
+
+    return evicted, total
+
+def describe_age(timestamp):
+    delta = max(0, time.time() - timestamp)
+    if delta < 3600:
+        return f"{int(delta // 60)} min ago"
+    if delta < 86400:
+        return f"{int(delta // 3600)} h ago"
+    return f"{int(delta // 86400)} days ago"
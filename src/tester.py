@@ -0,0 +1,176 @@
+import os
+import re
+import json
+import time
+import threading
+import subprocess
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from rich.console import Console
+from src import build_cache
+from src import trace
+from src.watch import IGNORED_DIRS
+
+console = Console()
+
+# 'pck test': every test file is one process, run by a pool as wide as the machine.
+# Durations of the previous runs are kept in .pck_cache/test_durations.json and
+# the slowest tests are started first, so a long test never ends up alone at the
+# tail of the run. Tests never seen before go first of all (their cost is unknown).
+DURATIONS_FILE = os.path.join(build_cache.BUILD_CACHE_DIR, "test_durations.json")
+JUNIT_FILE = os.path.join(build_cache.BUILD_CACHE_DIR, "junit.xml")
+OUTPUT_TAIL_LINES = 30
+
+C_EXTENSIONS = build_cache.C_EXTENSIONS + build_cache.CPP_EXTENSIONS
+
+# Test output is written as is to junit.xml: colors and control characters would make it invalid XML
+_ANSI_RE = re.compile(r"\x1b(\[[0-9;?]*[ -/]*[@-~]|\][^\x07\x1b]*(\x07|\x1b\\)|[@-_])")
+_XML_INVALID_RE = re.compile("[^\t\n\r\x20-\ud7ff\ue000-\ufffd\U00010000-\U0010ffff]")
+
+def _language(name):
+    """'python', 'js' or 'c' for a test file name, None when it isn't one."""
+    if name.endswith(".py"):
+        if name.startswith("test_") or name.endswith("_test.py"):
+            return "python"
+    elif name.endswith(".js"):
+        if name.endswith((".test.js", ".spec.js")) or name.startswith("test_"):
+            return "js"
+    elif name.lower().endswith(C_EXTENSIONS) and name.startswith("test_"):
+        return "c"
+    return None
+
+def is_test_source(name):
+    """True for a C/C++ test entry point (own main()), which 'pck build' must leave out."""
+    return _language(name) == "c"
+
+def discover(project_dir, paths=None):
+    """
+    Test files under paths (files or folders, the whole project by default).
+    Returns [{"id", "lang", "path"}] sorted by id; id is the path relative to project_dir.
+    """
+    found = {}
+    for root_path in paths or [project_dir]:
+        root_path = os.path.abspath(root_path)
+        if os.path.isfile(root_path):
+            candidates = [root_path]
+        else:
+            candidates = []
+            for folder, dirs, files in os.walk(root_path):
+                dirs[:] = sorted(d for d in dirs if d not in IGNORED_DIRS and not d.startswith("."))
+                candidates.extend(os.path.join(folder, name) for name in files)
+        for path in candidates:
+            lang = _language(os.path.basename(path))
+            if lang:
+                test_id = os.path.relpath(path, project_dir).replace(os.sep, "/")
+                found[test_id] = {"id": test_id, "lang": lang, "path": path}
+    return [found[k] for k in sorted(found)]
+
+# --- SCHEDULING ---
+def load_durations(project_dir):
+    try:
+        with open(os.path.join(project_dir, DURATIONS_FILE), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def save_durations(project_dir, durations):
+    path = os.path.join(project_dir, DURATIONS_FILE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(durations, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def schedule(tests, durations):
+    """Unknown tests first, then longest recorded duration first (LPT scheduling)."""
+    return sorted(tests, key=lambda t: (t["id"] in durations, -durations.get(t["id"], 0.0), t["id"]))
+
+# --- EXECUTION ---
+def _tail(text, lines=OUTPUT_TAIL_LINES):
+    return "\n".join((text or "").rstrip().splitlines()[-lines:])
+
+def _execute(cmd, env, cwd, timeout):
+    """Runs one test process. Returns (status, output) with status 'passed', 'failed' or 'error'."""
+    try:
+        ret = trace.run(cmd, cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                        stdin=subprocess.DEVNULL, text=True, errors="replace", timeout=timeout)
+    except subprocess.TimeoutExpired as e:
+        output = e.output.decode("utf-8", "replace") if isinstance(e.output, bytes) else (e.output or "")
+        return "error", f"{output}\nTimed out after {timeout}s"
+    except OSError as e:
+        return "error", str(e)
+    return ("passed" if ret.returncode == 0 else "failed"), ret.stdout
+
+def _run_test(test, runners, project_dir, timeout):
+    start = time.perf_counter()
+    with trace.span("test", test=test["id"]):
+        prepared = runners[test["lang"]](test)
+        if prepared[0] is None:
+            status, output = "error", prepared[1]
+        else:
+            cmd, env = prepared
+            status, output = _execute(cmd, env, project_dir, timeout)
+    return {**test, "status": status, "output": output, "duration": time.perf_counter() - start}
+
+def run_tests(tests, runners, project_dir, jobs=None, timeout=None):
+    """
+    Runs tests in a pool of 'jobs' workers (one per core by default), printing
+    one line per test as it completes. runners maps a language to a function
+    returning (cmd, env) for a test, or (None, error text) when it can't be run.
+    Returns the results in completion order.
+    """
+    durations = load_durations(project_dir)
+    ordered = schedule(tests, durations)
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(ordered) or 1))
+    results = []
+    print_lock = threading.Lock()
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(_run_test, t, runners, project_dir, timeout) for t in ordered]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            with print_lock:
+                _print_result(result)
+
+    for r in results:
+        if r["status"] != "error":
+            durations[r["id"]] = round(r["duration"], 3)
+    save_durations(project_dir, durations)
+    return results
+
+def _print_result(result):
+    label = {"passed": "[green]PASS[/green]", "failed": "[red]FAIL[/red]", "error": "[red]ERROR[/red]"}[result["status"]]
+    console.print(f"{label} {result['id']} [dim]({result['duration']:.2f}s)[/dim]")
+    if result["status"] != "passed" and result["output"]:
+        console.print(_tail(result["output"]), markup=False, highlight=False)
+
+# --- REPORT ---
+def _xml_text(text):
+    return _XML_INVALID_RE.sub("", _ANSI_RE.sub("", text or ""))
+
+def write_junit(results, path, elapsed):
+    """JUnit XML report (one testsuite per language, one testcase per test file)."""
+    root = ET.Element("testsuites", name="pck", tests=str(len(results)), time=f"{elapsed:.3f}",
+                      failures=str(sum(r["status"] == "failed" for r in results)),
+                      errors=str(sum(r["status"] == "error" for r in results)))
+    for lang in sorted({r["lang"] for r in results}):
+        suite_results = sorted((r for r in results if r["lang"] == lang), key=lambda r: r["id"])
+        suite = ET.SubElement(root, "testsuite", name=lang, tests=str(len(suite_results)),
+                              failures=str(sum(r["status"] == "failed" for r in suite_results)),
+                              errors=str(sum(r["status"] == "error" for r in suite_results)),
+                              time=f"{sum(r['duration'] for r in suite_results):.3f}")
+        for r in suite_results:
+            case = ET.SubElement(suite, "testcase", classname=lang, name=r["id"], time=f"{r['duration']:.3f}")
+            output = _xml_text(r["output"])
+            if r["status"] == "failed":
+                ET.SubElement(case, "failure", message="exit status != 0").text = output
+            elif r["status"] == "error":
+                ET.SubElement(case, "error", message=_tail(output, 1)).text = output
+            else:
+                ET.SubElement(case, "system-out").text = output
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    ET.ElementTree(root).write(path, encoding="utf-8", xml_declaration=True)
+    return path
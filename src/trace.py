@@ -0,0 +1,123 @@
+import os
+import json
+import time
+import threading
+import subprocess
+from contextlib import contextmanager
+
+# Chrome / Perfetto trace-event recorder behind 'pck --trace out.json'.
+# The same spans also feed the timing history (src/history.py), which only keeps
+# a total per span name plus counters (cache hits...), see record_phases().
+# When both are off, span(), run() and count() cost an 'is None' check.
+_events = None
+_phases = None    # {span name: [total ms, calls]}
+_counters = None  # {counter name: value}
+_output_path = None
+_origin = 0.0
+_root = None  # (name, start) of the span covering the whole command
+_lock = threading.Lock()
+
+def _now_us():
+    return (time.perf_counter() - _origin) * 1e6
+
+def enabled():
+    return _events is not None
+
+def enable(output_path, name="pck"):
+    """Starts recording. Everything until write() is nested under a 'name' span."""
+    global _events, _output_path, _origin, _root
+    _events = []
+    _output_path = output_path
+    _origin = time.perf_counter()
+    _root = (name, 0.0)
+
+def record_phases():
+    """Starts summing span durations per name, for phases()."""
+    global _phases, _counters
+    _phases = {}
+    _counters = {}
+
+def phases():
+    """({span name: [total ms, calls]}, {counter: value}) recorded so far, or (None, None)."""
+    return _phases, _counters
+
+def count(name, n=1):
+    """Adds n to a counter of the timing history (no-op when it isn't recorded)."""
+    if _counters is None:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+def _add(name, cat, start_us, args):
+    event = {
+        "name": name,
+        "cat": cat,
+        "ph": "X",
+        "ts": round(start_us, 3),
+        "dur": round(_now_us() - start_us, 3),
+        "pid": os.getpid(),
+        "tid": threading.get_ident(),
+    }
+    if args:
+        event["args"] = args
+    with _lock:
+        if _events is not None:
+            _events.append(event)
+
+@contextmanager
+def span(name, cat="pck", **args):
+    """Times the enclosed block as one complete ('X') event."""
+    if _events is None and _phases is None:
+        yield
+        return
+    start = _now_us()
+    try:
+        yield
+    finally:
+        if _phases is not None:
+            elapsed_ms = (_now_us() - start) / 1000
+            with _lock:
+                phase = _phases.setdefault(name, [0.0, 0])
+                phase[0] += elapsed_ms
+                phase[1] += 1
+        if _events is not None:
+            _add(name, cat, start, args)
+
+def run(cmd, **kwargs):
+    """subprocess.run() recorded as a 'subprocess' span (name: program + first argument)."""
+    if _events is None:
+        return subprocess.run(cmd, **kwargs)
+    parts = [str(c) for c in cmd] if isinstance(cmd, (list, tuple)) else [str(cmd)]
+    name = " ".join([os.path.basename(parts[0])] + parts[1:2])
+    start = _now_us()
+    returncode = None
+    try:
+        result = subprocess.run(cmd, **kwargs)
+        returncode = result.returncode
+        return result
+    finally:
+        _add(name, "subprocess", start, {"cmd": parts, "returncode": returncode})
+
+def write():
+    """Closes the root span, dumps the trace file and stops recording. Returns the path."""
+    global _events, _output_path
+    if _events is None:
+        return None
+    name, start = _root
+    _add(name, "pck", start, None)
+
+    pid = os.getpid()
+    metadata = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": "pck"}}]
+    threads = {e["tid"] for e in _events}
+    main_tid = threading.main_thread().ident
+    for tid in threads:
+        label = "main" if tid == main_tid else f"worker-{tid}"
+        metadata.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": label}})
+
+    path = _output_path
+    events = metadata + sorted(_events, key=lambda e: e["ts"])
+    _events = None
+    _output_path = None
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    return path
@@ -1,6 +1,7 @@
-import yaml
 import os
 import sys
+import json
+from src.store import get_entry_dir
 
 def get_root_dir():
     """
@@ -17,6 +18,31 @@ def get_root_dir():
 
 ROOT_DIR = get_root_dir()
 
+# Parsed config.yaml, stored as JSON and keyed by the yaml mtime/size so that
+# normal runs never need to import/run PyYAML.
+CONFIG_CACHE_FILE = os.path.join(ROOT_DIR, ".pck_config_cache.json")
+
+def _read_config_cache(config_path, stamp):
+    try:
+        with open(CONFIG_CACHE_FILE, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cache.get("path") != config_path or cache.get("stamp") != stamp:
+        return None
+    return cache.get("config")
+
+def _write_config_cache(config_path, stamp, config):
+    tmp_path = f"{CONFIG_CACHE_FILE}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"path": config_path, "stamp": stamp, "config": config}, f)
+        os.replace(tmp_path, CONFIG_CACHE_FILE)
+    except (OSError, TypeError, ValueError):
+        # Read-only install folder or non-JSON values: simply run without cache
+        try: os.remove(tmp_path)
+        except OSError: pass
+
 def load_config():
     config_path = os.path.join(ROOT_DIR, "config.yaml")
     
@@ -29,8 +55,15 @@ def load_config():
     if not os.path.exists(config_path):
         raise FileNotFoundError(f"Config file not found at: {config_path}")
 
-    with open(config_path, "r") as f:
-        config = yaml.safe_load(f)
+    st = os.stat(config_path)
+    stamp = [st.st_mtime_ns, st.st_size]
+    config = _read_config_cache(config_path, stamp)
+    if config is None:
+        import yaml
+
+        with open(config_path, "r") as f:
+            config = yaml.safe_load(f)
+        _write_config_cache(config_path, stamp, config)
     
     base_setting = config['settings']['base_dir']
     if not os.path.isabs(base_setting):
@@ -38,13 +71,29 @@ def load_config():
         
     return config
 
+# Left in base_dir by 'pck bundle import'. While it exists, uv and npm run offline
+# (from their bundled caches); PCK_OFFLINE=1/0 forces offline mode on or off.
+OFFLINE_MARKER = ".pck_offline"
+OFFLINE_ENV = "PCK_OFFLINE"
+
+def is_offline(config: dict):
+    forced = os.environ.get(OFFLINE_ENV)
+    if forced:
+        return forced != "0"
+    return os.path.exists(os.path.join(config['settings']['base_dir'], OFFLINE_MARKER))
+
+def apply_offline_mode(config: dict):
+    """Makes the uv and npm processes started from now on work from their caches only."""
+    if is_offline(config):
+        os.environ.setdefault("UV_OFFLINE", "1")
+        os.environ.setdefault("npm_config_offline", "true")
+
 def get_tool_path(tool_name: str, config: dict):
-    base_dir = config['settings']['base_dir']
+    entry_dir = get_entry_dir(tool_name, config)
     exe_rel_path = config['tools'][tool_name]['exe_path']
-    return os.path.join(base_dir, exe_rel_path)
+    return os.path.join(entry_dir, exe_rel_path)
 
 def get_npm_command(config: dict):
     node_path = get_tool_path('node', config)
-    base_dir = config['settings']['base_dir']
-    npm_script = os.path.join(base_dir, config['tools']['node']['npm_path'])
+    npm_script = os.path.join(get_entry_dir('node', config), config['tools']['node']['npm_path'])
     return [node_path, npm_script]
\ No newline at end of file
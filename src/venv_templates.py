@@ -0,0 +1,205 @@
+import os
+import csv
+import shutil
+import hashlib
+from rich.console import Console
+from src import locks
+from src import trace
+
+console = Console()
+
+# Warm virtualenvs, one per (python version, base requirements):
+#   <base_dir>/venv_templates/<key>/.venv
+# New projects are cloned from them with hardlinks instead of running 'uv venv'.
+TEMPLATES_DIR = "venv_templates"
+READY_MARKER = ".pck_template_ready"
+LOCKS_DIR = ".locks"  # <base_dir>/venv_templates/.locks/<key>.lock
+
+# Only these files can contain absolute paths of the venv that need fixing up
+SCRIPT_DIRS = ("bin", "Scripts")
+
+def _python_in(venv_dir):
+    if os.name == 'nt':
+        return os.path.join(venv_dir, "Scripts", "python.exe")
+    return os.path.join(venv_dir, "bin", "python")
+
+def template_key(python_version=None, requirements=None):
+    key = python_version or "default"
+    if requirements:
+        with open(requirements, "rb") as f:
+            key += "-" + hashlib.sha256(f.read()).hexdigest()[:12]
+    return key
+
+def ensure_template(config, uv_path, python_version=None, requirements=None):
+    """Returns the template .venv for this version/requirements set, creating it once."""
+    templates_root = os.path.join(config['settings']['base_dir'], TEMPLATES_DIR)
+    key = template_key(python_version, requirements)
+    template_dir = os.path.join(templates_root, key)
+    venv_dir = os.path.join(template_dir, ".venv")
+    if os.path.exists(os.path.join(template_dir, READY_MARKER)):
+        return venv_dir
+
+    # Concurrent 'pck create' runs build a missing template once, the others wait for it
+    on_wait = lambda: console.print("[dim]⏳ Waiting for another pck process to prepare the template...[/dim]")
+    with locks.file_lock(os.path.join(templates_root, LOCKS_DIR, f"{key}.lock"), on_wait=on_wait):
+        if os.path.exists(os.path.join(template_dir, READY_MARKER)):
+            return venv_dir
+        return _build_template(uv_path, template_dir, venv_dir, python_version, requirements)
+
+def _build_template(uv_path, template_dir, venv_dir, python_version, requirements):
+    console.print(f"[yellow]🧊 Preparing Python {python_version or ''} template (first use only)...[/yellow]")
+    # Built in place (scripts embed the venv path); only the marker makes it usable
+    shutil.rmtree(template_dir, ignore_errors=True)
+    try:
+        os.makedirs(template_dir)
+        cmd = [uv_path, "venv", venv_dir]
+        if python_version:
+            cmd.extend(["--python", python_version])
+        if trace.run(cmd).returncode != 0:
+            raise RuntimeError("uv venv failed")
+
+        if requirements:
+            cmd = [uv_path, "pip", "install", "--python", _python_in(venv_dir), "-r", requirements]
+            if trace.run(cmd).returncode != 0:
+                raise RuntimeError("installing base requirements failed")
+
+        with open(os.path.join(template_dir, READY_MARKER), "w") as f:
+            f.write(python_version or "default")
+    except Exception as e:
+        console.print(f"[bold red]Could not create venv template: {e}[/bold red]")
+        shutil.rmtree(template_dir, ignore_errors=True)
+        return None
+    return venv_dir
+
+def _needs_fixup(rel_path):
+    parts = rel_path.split(os.sep)
+    if rel_path == "pyvenv.cfg" or rel_path.endswith(".pth"):
+        return True
+    return parts[0] in SCRIPT_DIRS and len(parts) == 2
+
+def _rewrite(src, dst, old_prefix, new_prefix):
+    """
+    Copies src to dst replacing old_prefix.
+    Returns True if rewritten, None if src doesn't mention old_prefix, False if it is binary.
+    """
+    with open(src, "rb") as f:
+        data = f.read()
+    old_bytes = old_prefix.encode("utf-8")
+    if old_bytes not in data:
+        return None
+    if b"\0" in data:
+        return False
+    with open(dst, "wb") as f:
+        f.write(data.replace(old_bytes, new_prefix.encode("utf-8")))
+    shutil.copymode(src, dst)
+    return True
+
+def clone_venv(template_venv, target_venv):
+    """
+    Materializes template_venv at target_venv: every file is hardlinked (copied if
+    linking is impossible), except the few activation/config files that embed the
+    venv path, which are rewritten. Returns the list of files that still point to
+    the template (binary launchers).
+    """
+    template_venv = os.path.abspath(template_venv)
+    target_venv = os.path.abspath(target_venv)
+    unpatched = []
+
+    for root, dirs, files in os.walk(template_venv):
+        rel_root = os.path.relpath(root, template_venv)
+        dest_root = target_venv if rel_root == "." else os.path.join(target_venv, rel_root)
+        os.makedirs(dest_root, exist_ok=True)
+
+        # Symlinked folders (lib64 -> lib on Linux) are recreated, not walked
+        for name in list(dirs):
+            src = os.path.join(root, name)
+            if os.path.islink(src):
+                os.symlink(os.readlink(src), os.path.join(dest_root, name))
+                dirs.remove(name)
+
+        for name in files:
+            src = os.path.join(root, name)
+            dst = os.path.join(dest_root, name)
+            rel_path = os.path.normpath(os.path.join(rel_root, name))
+
+            if os.path.islink(src):
+                link = os.readlink(src)
+                os.symlink(link.replace(template_venv, target_venv), dst)
+                continue
+
+            if _needs_fixup(rel_path):
+                result = _rewrite(src, dst, template_venv, target_venv)
+                if result:
+                    continue
+                if result is False:
+                    unpatched.append(rel_path)
+
+            try:
+                os.link(src, dst)
+            except OSError:
+                shutil.copy2(src, dst)
+
+    return unpatched
+
+def _launcher_owners(venv_dir, rel_paths):
+    """
+    {rel path: 'name==version'} of the distributions whose RECORD lists each of
+    rel_paths (venv-relative). Launchers no distribution claims are left out.
+    """
+    wanted = {os.path.normcase(os.path.normpath(p)) for p in rel_paths}
+    owners = {}
+    for root, dirs, files in os.walk(venv_dir):
+        if not root.endswith(".dist-info") or "RECORD" not in files:
+            continue
+        dirs[:] = []
+        name, _, version = os.path.basename(root)[:-len(".dist-info")].partition("-")
+        site_packages = os.path.dirname(root)
+        with open(os.path.join(root, "RECORD"), "r", encoding="utf-8", newline="") as f:
+            for row in csv.reader(f):
+                if not row:
+                    continue
+                rel_path = os.path.relpath(os.path.normpath(os.path.join(site_packages, row[0])), venv_dir)
+                if os.path.normcase(rel_path) in wanted:
+                    owners[rel_path] = f"{name}=={version}"
+    return owners
+
+def _regenerate_launchers(uv_path, target_venv, unpatched):
+    """
+    Binary launchers (Windows .exe entry points) embed the template's interpreter:
+    reinstalls the distributions that own them into the clone, which writes new
+    ones. Returns False when that isn't possible.
+    """
+    owners = _launcher_owners(target_venv, unpatched)
+    if len(owners) < len(unpatched):
+        return False
+    for rel_path in unpatched:
+        # Hardlinked to the template: unlinked, never written through
+        os.remove(os.path.join(target_venv, rel_path))
+    cmd = [uv_path, "pip", "install", "--python", _python_in(target_venv),
+           "--reinstall", "--no-deps"] + sorted(set(owners.values()))
+    return trace.run(cmd).returncode == 0
+
+def create_from_template(config, uv_path, target_dir, python_version=None, requirements=None):
+    """Creates target_dir/.venv from a warm template. Returns True on success."""
+    template_venv = ensure_template(config, uv_path, python_version, requirements)
+    if not template_venv:
+        return False
+
+    target_venv = os.path.join(target_dir, ".venv")
+    if os.path.exists(target_venv):
+        console.print(f"[red]{target_venv} already exists.[/red]")
+        return False
+
+    try:
+        unpatched = clone_venv(template_venv, target_venv)
+    except OSError as e:
+        # e.g. symlinks not allowed (Windows without developer mode): the caller falls back to 'uv venv'
+        console.print(f"[yellow]Could not clone the venv template: {e}[/yellow]")
+        shutil.rmtree(target_venv, ignore_errors=True)
+        return False
+    if unpatched and not _regenerate_launchers(uv_path, target_venv, unpatched):
+        # Those launchers would run the template's interpreter and site-packages
+        console.print(f"[yellow]Could not regenerate {', '.join(unpatched)} in the clone.[/yellow]")
+        shutil.rmtree(target_venv, ignore_errors=True)
+        return False
+    return True
@@ -0,0 +1,216 @@
+import os
+import time
+import queue
+import signal
+import subprocess
+from rich.console import Console
+
+console = Console()
+
+# Watch mode behind 'pck run --watch'. The toolchain, interpreter and dependency
+# flags are resolved once by the caller; on every source change only prepare()
+# runs again (a cached rebuild for C/C++), then the program is restarted.
+# File events come from the optional 'watchdog' package (inotify, FSEvents,
+# ReadDirectoryChangesW) and fall back to polling when it isn't installed or the
+# OS refuses the watch (e.g. the inotify watch limit on big node_modules trees).
+DEBOUNCE_SECONDS = 0.15
+POLL_INTERVAL = 0.5
+STOP_TIMEOUT = 2.0
+
+# Generated or third-party folders: never watched
+IGNORED_DIRS = {
+    ".git", ".venv", "venv", "node_modules", "pck_modules", ".zig-cache", ".conan_store",
+    ".pck_cache", "build", "__pycache__", ".pytest_cache",
+}
+
+# watchdog event types that mean the content changed
+CHANGE_EVENTS = {"created", "modified", "moved", "deleted"}
+
+EXTENSIONS = {
+    "python": (".py",),
+    "js": (".js", ".mjs", ".cjs", ".json"),
+    "c": (".c", ".cpp", ".cc", ".cxx", ".h", ".hpp", ".hh", ".hxx", ".inl"),
+}
+
+def _is_relevant(path, root, extensions):
+    if not path.endswith(extensions):
+        return False
+    rel_parts = os.path.relpath(path, root).split(os.sep)
+    return not any(part in IGNORED_DIRS for part in rel_parts[:-1])
+
+# --- WATCHERS ---
+class PollingWatcher:
+    """Portable fallback: compares (mtime, size) snapshots of the tree."""
+
+    def __init__(self, root, extensions):
+        self.root = root
+        self.extensions = extensions
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        stack = [self.root]
+        while stack:
+            try:
+                entries = list(os.scandir(stack.pop()))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in IGNORED_DIRS:
+                        stack.append(entry.path)
+                elif entry.name.endswith(self.extensions):
+                    try:
+                        st = entry.stat()
+                        snapshot[entry.path] = (st.st_mtime_ns, st.st_size)
+                    except OSError:
+                        pass
+        return snapshot
+
+    def poll(self, timeout):
+        """Blocks up to timeout seconds. Returns the set of changed paths."""
+        time.sleep(min(timeout, POLL_INTERVAL))
+        current = self._scan()
+        previous, self._snapshot = self._snapshot, current
+        changed = {p for p, ident in current.items() if previous.get(p) != ident}
+        changed.update(p for p in previous if p not in current)
+        return changed
+
+    def close(self):
+        pass
+
+class EventWatcher:
+    """Native file events through watchdog."""
+
+    def __init__(self, root, extensions):
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+
+        self.root = root
+        self.extensions = extensions
+        self._events = queue.Queue()
+        events = self._events
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                # Opened/closed-without-write events (e.g. the program reading its own source) are noise
+                if not event.is_directory and event.event_type in CHANGE_EVENTS:
+                    for path in (event.src_path, getattr(event, "dest_path", "")):
+                        if path:
+                            events.put(os.fsdecode(path))
+
+        self._observer = Observer()
+        self._observer.schedule(Handler(), root, recursive=True)
+        try:
+            self._observer.start()
+        except OSError:
+            self._observer.stop()
+            raise
+
+    def poll(self, timeout):
+        changed = set()
+        try:
+            path = self._events.get(timeout=timeout)
+            while True:
+                if _is_relevant(path, self.root, self.extensions):
+                    changed.add(path)
+                path = self._events.get_nowait()
+        except queue.Empty:
+            pass
+        return changed
+
+    def close(self):
+        self._observer.stop()
+        self._observer.join()
+
+def create_watcher(root, extensions):
+    try:
+        return EventWatcher(root, extensions)
+    except ImportError:
+        console.print("[dim]watchdog not installed, polling for changes (pip install watchdog for instant reloads).[/dim]")
+    except OSError as e:
+        # The recursive watch covers node_modules & co too: it can exceed the inotify watch limit
+        console.print(f"[dim]File events unavailable ({e}), polling for changes.[/dim]")
+    return PollingWatcher(root, extensions)
+
+def wait_for_changes(watcher, timeout):
+    """
+    Returns the changed paths seen within timeout, after the tree has been quiet
+    for DEBOUNCE_SECONDS (editors often write a file several times per save).
+    """
+    changed = watcher.poll(timeout)
+    if not changed:
+        return changed
+    while True:
+        more = watcher.poll(DEBOUNCE_SECONDS)
+        if not more:
+            return changed
+        changed |= more
+
+# --- PROCESS CONTROL ---
+def _start(cmd, env):
+    kwargs = {}
+    if os.name == "nt":
+        kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True  # Own process group: children die with it
+    return subprocess.Popen(cmd, env=env, **kwargs)
+
+def _stop(process):
+    """Terminates the program and everything it spawned. Kills it after STOP_TIMEOUT."""
+    if process is None or process.poll() is not None:
+        return
+    try:
+        if os.name == "nt":
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)], capture_output=True)
+        else:
+            os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=STOP_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        if os.name != "nt":
+            os.killpg(process.pid, signal.SIGKILL)
+        process.kill()
+        process.wait()
+    except (OSError, ProcessLookupError):
+        pass
+
+def run_watch(prepare, root, extensions):
+    """
+    prepare() returns (cmd, env) to launch, or (None, None) when the build failed.
+    Runs it, then restarts it on every relevant change until Ctrl+C.
+    """
+    watcher = create_watcher(root, extensions)
+    process = None
+
+    def restart(old):
+        # Stopped before rebuilding: a running executable can't be overwritten on Windows
+        _stop(old)
+        cmd, env = prepare()
+        if cmd is None:
+            console.print("[yellow]Waiting for changes...[/yellow]")
+            return None
+        return _start(cmd, env)
+
+    console.print(f"[bold cyan]👀 Watching {root} (Ctrl+C to stop)[/bold cyan]")
+    try:
+        process = restart(None)
+        reported = False
+        while True:
+            changed = wait_for_changes(watcher, 0.2)
+            if process is not None and not reported and process.poll() is not None:
+                console.print(f"[dim]Process exited with code {process.returncode}. Waiting for changes...[/dim]")
+                reported = True
+            if not changed:
+                continue
+
+            names = ", ".join(sorted(os.path.relpath(p, root) for p in changed)[:3])
+            more = f" (+{len(changed) - 3})" if len(changed) > 3 else ""
+            console.print(f"[bold cyan]🔄 {names}{more} changed, restarting...[/bold cyan]")
+            process = restart(process)
+            reported = False
+    except KeyboardInterrupt:
+        pass
+    finally:
+        _stop(process)
+        watcher.close()
+    return 0